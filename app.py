@@ -2,11 +2,121 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
-from datetime import datetime
+import copy
+import logging
+from datetime import datetime, timedelta
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from backend import SHARED_SECRET, JobQueue, connect
+from donations import DonationLedger
+from feed import FEED_FILE, FEED_PORT, DonationFeed, merge_delta
+from memory import SessionMemoryGuard
+from model import (
+    allocation_categories, budget_categories, compute_all, compute_budget, compute_revenue,
+    default_inputs, revenue_categories, total_budget,
+)
+from registry import REGISTRY_PATH, DogRegistry
+from scheduler import OPENING_HOURS, REVENUE_STREAM, ROOMS, SERVICES, ClinicScheduler
+from scenarios import ScenarioStore, SharedScenarioStore, same_inputs
+from sensitivity import analyse, output_names, tornado_figure
 
 # Set the page configuration
 st.set_page_config(page_title="Dog Shelter Project Proposal", layout="wide")
 
+logger = logging.getLogger(__name__)
+
+
+# Store shared by every replica (Redis or a file); None when running a single process
+@st.cache_resource
+def get_shared_store():
+    return connect()
+
+
+# Heavy jobs run once cluster-wide; every replica contributes a worker.
+# Results are signed with the shared secret, so the queue is only used when one is set
+@st.cache_resource
+def get_job_queue():
+    shared_store = get_shared_store()
+    if shared_store is None or not SHARED_SECRET:
+        return None
+    job_queue = JobQueue(shared_store, secret=SHARED_SECRET)
+    job_queue.register("sensitivity", analyse)
+    return job_queue.start_workers()
+
+
+# Shared donation ledger (one pooled connection for every session)
+@st.cache_resource
+def get_ledger():
+    return DonationLedger()
+
+
+# Live donation feed, started once per process when an event source is configured
+@st.cache_resource
+def get_feed():
+    if not (FEED_FILE or FEED_PORT):
+        return None
+    return DonationFeed(get_ledger()).start(path=FEED_FILE, port=FEED_PORT)
+
+
+# Content-addressed store behind shareable ?scenario=<hash> links
+@st.cache_resource
+def get_scenario_store():
+    shared_store = get_shared_store()
+    if shared_store is not None:
+        return SharedScenarioStore(shared_store)
+    return ScenarioStore()
+
+
+# Animal registry, loaded once and shared read-only by every session
+@st.cache_resource
+def get_registry():
+    if not REGISTRY_PATH:
+        return None
+    return DogRegistry.from_csv(REGISTRY_PATH)
+
+
+# Per-session memory accounting and budget enforcement
+@st.cache_resource
+def get_memory_guard():
+    return SessionMemoryGuard()
+
+
+# Veterinary clinic appointment book shared by every session
+@st.cache_resource
+def get_scheduler():
+    return ClinicScheduler()
+
+
+# One-at-a-time swings and Sobol indices of the revenue model, cached per input vector
+@st.cache_data
+def get_sensitivity(revenue_input, expected_units, allocation_percentages, perturbation):
+    job_queue = get_job_queue()
+    if job_queue is not None:
+        try:
+            return job_queue.run(
+                "sensitivity", revenue_input, expected_units, allocation_percentages, perturbation, timeout=30
+            )
+        except Exception:
+            # A busy or unreachable cluster, a failed job or a bad result must not
+            # break the page; compute locally instead
+            logger.exception("Sensitivity job failed; computing it in this process")
+    return analyse(revenue_input, expected_units, allocation_percentages, perturbation)
+
+
+# Shareable links use st.query_params, falling back to the experimental API on older Streamlit
+def get_query_param(name):
+    if hasattr(st, "query_params"):
+        return st.query_params.get(name)
+    return st.experimental_get_query_params().get(name, [None])[0]
+
+
+def set_query_param(name, value):
+    if hasattr(st, "query_params"):
+        st.query_params[name] = value
+    else:
+        st.experimental_set_query_params(**{name: value})
+
+
 # Title
 st.title("Interactive Project Proposal for Establishing a Dog Shelter in Georgia")
 
@@ -26,6 +136,44 @@ sections = [
 ]
 selection = st.sidebar.radio("Go to", sections)
 
+# Restore a shared scenario from the URL; its inputs become the widget defaults
+scenario_store = get_scenario_store()
+scenario_id = get_query_param("scenario")
+scenario = scenario_store.load(scenario_id) if scenario_id else None
+scenario_defaults = scenario.inputs if scenario is not None else default_inputs
+
+# Full input vector of this session, updated by the interactive sections below
+if st.session_state.get("scenario_id") != scenario_id or "scenario_inputs" not in st.session_state:
+    st.session_state["scenario_id"] = scenario_id
+    st.session_state["scenario_inputs"] = copy.deepcopy(scenario_defaults)
+
+st.sidebar.header("Share Scenario")
+if st.sidebar.button("Create Shareable Link"):
+    scenario_id = scenario_store.save(st.session_state["scenario_inputs"], compute_all)
+    scenario = scenario_store.load(scenario_id)
+    st.session_state["scenario_id"] = scenario_id
+    set_query_param("scenario", scenario_id)
+if scenario is not None:
+    st.sidebar.caption(f"Scenario `{scenario_id}`: share this page's URL to restore it.")
+elif scenario_id:
+    st.sidebar.warning(f"Scenario `{scenario_id}` was not found; showing the default inputs.")
+
+# Keep this session's cached data within its memory budget; sections that cache
+# new data enforce the budget again right after writing it
+memory_guard = get_memory_guard()
+memory_caption = st.sidebar.empty()
+
+
+def enforce_memory_budget():
+    used, evicted = memory_guard.enforce(get_script_run_ctx().session_id, st.session_state)
+    memory_caption.caption(
+        f"Session memory: {used / 1024:,.0f} KB of {memory_guard.budget_bytes / 1024 ** 2:,.1f} MB"
+    )
+    return used, evicted
+
+
+session_bytes, evicted_keys = enforce_memory_budget()
+
 # Introduction with Interactive Budget and Donation Features
 if selection == "Introduction":
     st.header("1. Executive Summary")
@@ -55,21 +203,12 @@ if selection == "Introduction":
     # Interactive Budget Allocation and Donation Impact
     st.subheader("Interactive Budget Allocation and Donation Impact")
     
-    # Define budget categories
-    budget_categories = ['Construction', 'Equipment', 'Staffing', 'Operations', 'Programs', 'Contingency']
-    default_budget = {
-        'Construction': 60000,
-        'Equipment': 25000,
-        'Staffing': 80000,
-        'Operations': 22500,
-        'Programs': 17500,
-        'Contingency': 10000
-    }
+    # Budget categories and defaults (restored from a shared scenario when present)
+    default_budget = scenario_defaults['budget_allocation']
     
     # Sidebar inputs for budget allocation
     st.sidebar.header("Adjust Budget Allocation")
     budget_allocation = {}
-    total_budget = 250000
     
     # Sliders for each budget category except 'Contingency'
     allocated = 0
@@ -87,25 +226,21 @@ if selection == "Introduction":
     
     # 'Contingency' gets the remaining budget
     budget_allocation['Contingency'] = total_budget - allocated
+    st.session_state["scenario_inputs"]["budget_allocation"] = budget_allocation
     
-    # Convert to DataFrame for display
-    budget_df = pd.DataFrame({
-        'Category': list(budget_allocation.keys()),
-        'Amount (USD)': list(budget_allocation.values())
-    })
+    # Render a shared scenario from its stored results while its inputs are untouched
+    if scenario is not None and same_inputs(budget_allocation, scenario.inputs['budget_allocation']):
+        budget_results = scenario.results
+    else:
+        budget_results = compute_budget(budget_allocation)
+    budget_df = budget_results['frames']['budget']
+    fig_budget = budget_results['figures']['budget']
     
     # Display Budget Table
     st.table(budget_df)
     
     # Plot Budget Allocation Pie Chart
     st.subheader("Budget Allocation")
-    fig_budget = px.pie(
-        budget_df,
-        values='Amount (USD)',
-        names='Category',
-        title='Budget Allocation',
-        hole=0.4
-    )
     st.plotly_chart(fig_budget, use_container_width=True)
     
     # Cost Analysis
@@ -125,6 +260,42 @@ if selection == "Introduction":
     # Donation Impact
     st.subheader("Donation Impact")
     
+    # Donations recorded in the ledger (running total, constant-time read)
+    ledger = get_ledger()
+    feed = get_feed()
+    
+    with st.form("record_donation", clear_on_submit=True):
+        donor_name = st.text_input("Donor name:")
+        donation_campaign = st.text_input("Campaign:", value="General")
+        donation_amount = st.number_input("Donation amount (USD):", min_value=0, step=100, value=0)
+        if st.form_submit_button("Record Donation") and donation_amount > 0:
+            donation = (donor_name or "Anonymous", donation_amount, donation_campaign or "General",
+                        int(datetime.now().timestamp()))
+            try:
+                ledger.record_many([donation])
+            except ValueError as error:
+                st.error(str(error))
+            else:
+                if feed is not None:
+                    feed.publish([donation])
+    
+    # The live feed keeps the same running totals in memory; subscribing takes the
+    # snapshot atomically, so no delta between the snapshot and the live loop is lost
+    if feed is not None:
+        subscription = feed.subscribe()
+        feed_state = subscription.snapshot
+        donations_received, donation_count = feed_state["amount"], feed_state["count"]
+    else:
+        donations_received, donation_count = ledger.total()
+    
+    donations_metric = st.empty()
+    donations_metric.metric(
+        label="Donations Received",
+        value=f"${donations_received:,.2f}",
+        delta=f"{donation_count:,} donations",
+        delta_color="off"
+    )
+    
     # Input for additional donations
     additional_donation = st.number_input(
         "Enter additional donation amount (USD):",
@@ -134,13 +305,14 @@ if selection == "Introduction":
     )
     
     # Calculate new total budget
-    new_total_budget = total_budget + additional_donation
+    new_total_budget = total_budget + donations_received + additional_donation
     
     # Calculate number of dogs that can be saved with new budget
     dogs_saved = new_total_budget / cost_per_dog
     
     # Display results
-    st.metric(
+    dogs_saved_metric = st.empty()
+    dogs_saved_metric.metric(
         label="Number of Stray Dogs Saved with Additional Donation",
         value=f"{int(dogs_saved):,} dogs"
     )
@@ -164,7 +336,8 @@ if selection == "Introduction":
         text='Dogs Saved'
     )
     fig_donation.update_traces(texttemplate='%{text:.0f}', textposition='auto')
-    st.plotly_chart(fig_donation, use_container_width=True)
+    donation_chart = st.empty()
+    donation_chart.plotly_chart(fig_donation, use_container_width=True)
     
     # Summary Metrics
     st.subheader("Summary")
@@ -172,6 +345,7 @@ if selection == "Introduction":
     st.markdown(f"""
     - **Current Total Budget:** ${total_budget:,.2f}
     - **Cost to Save One Stray Dog:** ${cost_per_dog:,.2f}
+    - **Donations Received:** ${donations_received:,.2f}
     - **Additional Donation:** ${additional_donation:,.2f}
     - **New Total Budget:** ${new_total_budget:,.2f}
     - **Total Number of Dogs Saved:** {int(dogs_saved):,} dogs
@@ -189,7 +363,7 @@ if selection == "Introduction":
     )
     
     # Recalculate with slider
-    new_total_budget_slider = total_budget + donation_slider
+    new_total_budget_slider = total_budget + donations_received + donation_slider
     dogs_saved_slider = new_total_budget_slider / cost_per_dog
     
     st.metric(
@@ -213,6 +387,79 @@ if selection == "Introduction":
     )
     fig_donation_slider.update_traces(texttemplate='%{text:.0f}', textposition='auto')
     st.plotly_chart(fig_donation_slider, use_container_width=True)
+    
+    # Live Donation Feed
+    st.subheader("Live Donation Feed")
+    
+    if feed is None:
+        st.info("Set DOGGY_FEED_FILE or DOGGY_FEED_PORT to stream donations into the ledger as they arrive.")
+    elif not st.checkbox("Follow live donations", value=False):
+        subscription.close()
+    else:
+        campaign_table = st.empty()
+        minute_chart = st.empty()
+        feed_status = st.empty()
+        
+        # Apply pushed deltas to this session's copy and redraw the Donation Impact
+        # placeholders above; any widget interaction interrupts the loop with a rerun
+        try:
+            delta, first_pass = None, True
+            while True:
+                if delta is not None:
+                    merge_delta(feed_state, delta)
+                    donations_received = feed_state["amount"]
+                    new_total_budget = total_budget + donations_received + additional_donation
+                    dogs_saved = new_total_budget / cost_per_dog
+                    
+                    donations_metric.metric(
+                        label="Donations Received",
+                        value=f"${donations_received:,.2f}",
+                        delta=f"{feed_state['count']:,} donations",
+                        delta_color="off"
+                    )
+                    dogs_saved_metric.metric(
+                        label="Number of Stray Dogs Saved with Additional Donation",
+                        value=f"{int(dogs_saved):,} dogs"
+                    )
+                    
+                    donation_data = pd.DataFrame({
+                        'Total Budget (USD)': [total_budget, new_total_budget],
+                        'Dogs Saved': [total_budget / cost_per_dog, dogs_saved]
+                    }, index=['Current Budget', 'After Donation'])
+                    fig_donation = px.bar(
+                        donation_data,
+                        x=donation_data.index,
+                        y='Dogs Saved',
+                        title='Impact of Additional Donations on Dogs Saved',
+                        labels={'index': 'Budget Scenario', 'Dogs Saved': 'Number of Dogs Saved'},
+                        text='Dogs Saved'
+                    )
+                    fig_donation.update_traces(texttemplate='%{text:.0f}', textposition='auto')
+                    donation_chart.plotly_chart(fig_donation, use_container_width=True)
+                
+                if first_pass or delta is not None:
+                    # Per-campaign totals
+                    campaign_df = pd.DataFrame(
+                        [(campaign, amount, count) for campaign, (amount, count) in feed_state["campaigns"].items()],
+                        columns=['Campaign', 'Amount (USD)', 'Donations']
+                    ).sort_values('Amount (USD)', ascending=False)
+                    campaign_table.table(campaign_df)
+                    
+                    # Per-minute donations over the recent window
+                    minutes = sorted(feed_state["minutes"])[-feed.window_minutes:]
+                    minute_df = pd.DataFrame({
+                        'Minute': pd.to_datetime(minutes, unit='s'),
+                        'Amount (USD)': [feed_state["minutes"][minute][0] for minute in minutes]
+                    })
+                    fig_minutes = px.bar(minute_df, x='Minute', y='Amount (USD)', title='Donations per Minute')
+                    minute_chart.plotly_chart(fig_minutes, use_container_width=True)
+                    first_pass = False
+                
+                # Touching an element at least twice a second lets Streamlit honour reruns
+                feed_status.caption(f"Listening for donations (last checked {datetime.now():%H:%M:%S})")
+                delta = subscription.wait(timeout=0.5)
+        finally:
+            subscription.close()
 
 # Problem Statement
 elif selection == "Problem Statement":
@@ -374,6 +621,53 @@ elif selection == "Project Description":
     - **Educational Programs:** Workshops and seminars on responsible pet ownership and animal welfare.
     - **Spay/Neuter Campaigns:** Initiatives to control the stray population through sterilization.
     """)
+    
+    st.subheader("4.4 Clinic Appointments")
+    
+    scheduler = get_scheduler()
+    
+    with st.form("book_appointment"):
+        appointment_room = st.selectbox("Room:", ROOMS)
+        appointment_service = st.selectbox("Service:", SERVICES)
+        appointment_date = st.date_input("Date:", value=datetime.now().date())
+        appointment_time = st.time_input("Start time:", value=datetime.strptime(f"{OPENING_HOURS[0]}:00", "%H:%M").time())
+        appointment_duration = st.number_input("Duration (minutes):", min_value=15, max_value=240, step=15, value=30)
+        appointment_dog = st.text_input("Dog:")
+        if st.form_submit_button("Book Appointment"):
+            appointment_start = datetime.combine(appointment_date, appointment_time)
+            try:
+                scheduler.book(appointment_room, appointment_start, appointment_duration, appointment_service, appointment_dog or None)
+                st.success(f"Booked {appointment_room} on {appointment_start:%Y-%m-%d at %H:%M}.")
+            except ValueError as error:
+                room, slot = scheduler.next_free_slot(appointment_start, appointment_duration, rooms=[appointment_room])
+                st.error(f"{error}. The next free slot in {room} is {slot:%Y-%m-%d at %H:%M}.")
+    
+    # Next free slot across all rooms
+    slot_duration = st.number_input("Find the next free slot for (minutes):", min_value=15, max_value=240, step=15, value=60)
+    slot_after = datetime.now().replace(second=0, microsecond=0)
+    slot_after += timedelta(minutes=-slot_after.minute % 15)  # next quarter hour
+    slot_room, slot_start = scheduler.next_free_slot(slot_after, slot_duration)
+    st.metric(
+        label="Next Free Slot",
+        value=f"{slot_start:%Y-%m-%d %H:%M}",
+        delta=slot_room,
+        delta_color="off"
+    )
+    
+    # Utilisation Report
+    utilisation_start = datetime.now().date().replace(day=1)
+    utilisation_end = (utilisation_start + timedelta(days=32)).replace(day=1)
+    utilisation_df = scheduler.utilisation(utilisation_start, utilisation_end)
+    st.table(utilisation_df)
+    
+    fig_utilisation = px.bar(
+        utilisation_df,
+        x='Room',
+        y='Utilisation (%)',
+        title=f'Clinic Utilisation in {utilisation_start:%B %Y}',
+        range_y=[0, 100]
+    )
+    st.plotly_chart(fig_utilisation, use_container_width=True)
 
 # Implementation Plan
 elif selection == "Implementation Plan":
@@ -473,16 +767,10 @@ elif selection == "Sustainability Plan":
     # Interactive Revenue Streams
     st.subheader("Interactive Revenue Streams")
     
-    # Define revenue categories
-    revenue_categories = ['Adoption Fees', 'Merchandise Sales', 'Veterinary Services', 'Grooming Services', 'Training Programs', 'Other']
-    default_revenue = {
-        'Adoption Fees': 20,          # in Euros per adoption
-        'Merchandise Sales': 10,      # average price per item
-        'Veterinary Services': 50,    # average fee per service
-        'Grooming Services': 30,      # average fee per grooming session
-        'Training Programs': 100,     # average fee per training session
-        'Other': 0                    # placeholder for additional revenue streams
-    }
+    # Revenue defaults (restored from a shared scenario when present)
+    revenue_defaults = scenario_defaults['revenue_input']
+    units_defaults = scenario_defaults['expected_units']
+    allocation_defaults = scenario_defaults['allocation_percentages']
     
     # Sidebar inputs for revenue streams
     st.sidebar.header("Adjust Revenue Streams")
@@ -494,42 +782,42 @@ elif selection == "Sustainability Plan":
                 f"Set {category} (Euros per adoption)",
                 min_value=0,
                 step=1,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
         elif category == 'Merchandise Sales':
             revenue_input[category] = st.sidebar.number_input(
                 f"Set {category} (Average price per item in Euros)",
                 min_value=0,
                 step=1,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
         elif category == 'Veterinary Services':
             revenue_input[category] = st.sidebar.number_input(
                 f"Set {category} (Average fee per service in Euros)",
                 min_value=0,
                 step=5,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
         elif category == 'Grooming Services':
             revenue_input[category] = st.sidebar.number_input(
                 f"Set {category} (Average fee per session in Euros)",
                 min_value=0,
                 step=5,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
         elif category == 'Training Programs':
             revenue_input[category] = st.sidebar.number_input(
                 f"Set {category} (Average fee per session in Euros)",
                 min_value=0,
                 step=10,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
         else:
             revenue_input[category] = st.sidebar.number_input(
                 f"Set {category} (Euros)",
                 min_value=0,
                 step=10,
-                value=default_revenue[category]
+                value=revenue_defaults[category]
             )
     
     st.markdown("---")
@@ -543,58 +831,89 @@ elif selection == "Sustainability Plan":
         "Expected number of adoptions per month:",
         min_value=0,
         step=1,
-        value=50
+        value=units_defaults['Adoption Fees']
     )
     expected_units['Merchandise Sales'] = st.number_input(
         "Expected number of merchandise items sold per month:",
         min_value=0,
         step=1,
-        value=100
+        value=units_defaults['Merchandise Sales']
     )
     expected_units['Veterinary Services'] = st.number_input(
         "Expected number of veterinary services per month:",
         min_value=0,
         step=1,
-        value=20
+        value=units_defaults['Veterinary Services']
     )
+    
+    # Realized veterinary services: appointments this month that have already taken place
+    today = datetime.now()
+    completed_services = get_scheduler().service_count(today.year, today.month, now=today)
+    if completed_services and st.checkbox(
+        f"Use the {completed_services:,} veterinary services completed so far in {today:%B %Y}", value=False
+    ):
+        expected_units[REVENUE_STREAM] = completed_services
     expected_units['Grooming Services'] = st.number_input(
         "Expected number of grooming sessions per month:",
         min_value=0,
         step=1,
-        value=30
+        value=units_defaults['Grooming Services']
     )
     expected_units['Training Programs'] = st.number_input(
         "Expected number of training sessions per month:",
         min_value=0,
         step=1,
-        value=10
+        value=units_defaults['Training Programs']
     )
     expected_units['Other'] = st.number_input(
         "Expected revenue from other sources per month (Euros):",
         min_value=0,
         step=10,
-        value=0
+        value=units_defaults['Other']
     )
     
-    # Calculate monthly revenue for each stream
-    monthly_revenue = {}
-    for category in revenue_categories:
-        if category == 'Other':
-            monthly_revenue[category] = expected_units[category]
-        else:
-            monthly_revenue[category] = revenue_input[category] * expected_units[category]
+    # Sidebar inputs for allocation
+    st.sidebar.header("Adjust Allocation Percentages")
+    allocation_percentages = {}
+    allocated_percent = 0
+    for category in allocation_categories[:-1]:
+        max_percent = 100 - allocated_percent - 1  # Reserve at least 1% for 'Other'
+        percent = st.sidebar.slider(
+            f"Allocate to {category} (%)",
+            min_value=0,
+            max_value=100,
+            value=allocation_defaults[category],
+            step=1
+        )
+        allocation_percentages[category] = percent
+        allocated_percent += percent
     
-    # Convert to DataFrame
-    revenue_df = pd.DataFrame({
-        'Revenue Stream': list(monthly_revenue.keys()),
-        'Monthly Revenue (Euros)': list(monthly_revenue.values())
-    })
+    # 'Other' gets the remaining percentage
+    allocation_percentages['Other'] = 100 - allocated_percent
+    
+    st.session_state["scenario_inputs"]["revenue_input"] = revenue_input
+    st.session_state["scenario_inputs"]["expected_units"] = expected_units
+    st.session_state["scenario_inputs"]["allocation_percentages"] = allocation_percentages
+    
+    # Render a shared scenario from its stored results while its inputs are untouched
+    if scenario is not None and same_inputs(
+        [revenue_input, expected_units, allocation_percentages],
+        [scenario.inputs['revenue_input'], scenario.inputs['expected_units'], scenario.inputs['allocation_percentages']]
+    ):
+        revenue_results = scenario.results
+    else:
+        revenue_results = compute_revenue(revenue_input, expected_units, allocation_percentages)
+    revenue_df = revenue_results['frames']['revenue']
+    allocation_df = revenue_results['frames']['allocation']
+    allocated_funds_df = revenue_results['frames']['allocated_funds']
+    fig_allocation = revenue_results['figures']['allocation']
+    allocated_funds = dict(zip(allocated_funds_df['Allocation Category'], allocated_funds_df['Annual Allocation (Euros)']))
     
     # Display Revenue Table
     st.table(revenue_df)
     
     # Calculate Total Monthly and Annual Revenue
-    total_monthly_revenue = sum(monthly_revenue.values())
+    total_monthly_revenue = revenue_df['Monthly Revenue (Euros)'].sum()
     total_annual_revenue = total_monthly_revenue * 12
     
     st.subheader("Total Revenue")
@@ -612,70 +931,14 @@ elif selection == "Sustainability Plan":
     # Allocation of Funds
     st.subheader("Allocation of Revenue")
     
-    # Define allocation categories (these should align with your budget or operational needs)
-    allocation_categories = ['Dog Care', 'Facility Maintenance', 'Staff Salaries', 'Operational Costs', 'Emergency Fund', 'Other']
-    
-    # Default allocation percentages
-    default_allocation = {
-        'Dog Care': 50,            # 50%
-        'Facility Maintenance': 15, # 15%
-        'Staff Salaries': 20,      # 20%
-        'Operational Costs': 10,   # 10%
-        'Emergency Fund': 3,       # 3%
-        'Other': 2                 # 2%
-    }
-    
-    # Sidebar inputs for allocation
-    st.sidebar.header("Adjust Allocation Percentages")
-    allocation_percentages = {}
-    allocated_percent = 0
-    for category in allocation_categories[:-1]:
-        max_percent = 100 - allocated_percent - 1  # Reserve at least 1% for 'Other'
-        percent = st.sidebar.slider(
-            f"Allocate to {category} (%)",
-            min_value=0,
-            max_value=100,
-            value=default_allocation[category],
-            step=1
-        )
-        allocation_percentages[category] = percent
-        allocated_percent += percent
-    
-    # 'Other' gets the remaining percentage
-    allocation_percentages['Other'] = 100 - allocated_percent
-    
-    # Convert to DataFrame
-    allocation_df = pd.DataFrame({
-        'Category': list(allocation_percentages.keys()),
-        'Percentage (%)': list(allocation_percentages.values())
-    })
-    
     # Display Allocation Table
     st.table(allocation_df)
     
-    # Calculate allocated funds
-    allocated_funds = {}
-    for category in allocation_categories:
-        allocated_funds[category] = (allocation_percentages[category] / 100) * total_annual_revenue
-    
-    # Convert to DataFrame
-    allocated_funds_df = pd.DataFrame({
-        'Allocation Category': list(allocated_funds.keys()),
-        'Annual Allocation (Euros)': list(allocated_funds.values())
-    })
-    
     # Display Allocation Table
     st.table(allocated_funds_df)
     
     # Plot Allocation Pie Chart
     st.subheader("Revenue Allocation")
-    fig_allocation = px.pie(
-        allocated_funds_df,
-        values='Annual Allocation (Euros)',
-        names='Allocation Category',
-        title='Annual Revenue Allocation',
-        hole=0.4
-    )
     st.plotly_chart(fig_allocation, use_container_width=True)
     
     # Summary Metrics
@@ -691,6 +954,40 @@ elif selection == "Sustainability Plan":
     - **Emergency Fund Allocation:** €{allocated_funds['Emergency Fund']:,.2f} ({allocation_percentages['Emergency Fund']}%)
     - **Other Allocation:** €{allocated_funds['Other']:,.2f} ({allocation_percentages['Other']}%)
     """)
+    
+    # Sensitivity Analysis
+    st.subheader("Sensitivity Analysis")
+    
+    st.markdown("""
+    Which of the twelve revenue inputs matter most? Each fee and volume is moved up and down on its own (tornado chart), and all of them are varied together to split the variance of the result between the inputs (Sobol indices).
+    """)
+    
+    perturbation = st.slider(
+        "Perturb each input by (±%):",
+        min_value=5,
+        max_value=50,
+        step=5,
+        value=20
+    )
+    sensitivity_output = st.selectbox("Output to analyse:", output_names())
+    
+    oat_df, sobol_df = get_sensitivity(revenue_input, expected_units, allocation_percentages, perturbation / 100)
+    
+    # Tornado Chart
+    fig_tornado = tornado_figure(oat_df, sensitivity_output)
+    st.plotly_chart(fig_tornado, use_container_width=True)
+    
+    # Sobol Indices
+    sobol_output_df = sobol_df[sobol_df['Output'] == sensitivity_output].sort_values('Total', ascending=False)
+    fig_sobol = px.bar(
+        sobol_output_df,
+        x='Input',
+        y=['First-order', 'Total'],
+        barmode='group',
+        title=f'Share of {sensitivity_output} Variance Explained by Each Input',
+        labels={'value': 'Sobol Index', 'variable': 'Index'}
+    )
+    st.plotly_chart(fig_sobol, use_container_width=True)
 
 # The rest of the sections remain unchanged
 elif selection == "Monitoring and Evaluation":
@@ -713,6 +1010,64 @@ elif selection == "Monitoring and Evaluation":
     - **Program Adjustments:** Modify programs based on evaluation findings to enhance effectiveness and impact.
     - **Staff Training:** Provide ongoing training to staff and volunteers to improve skills and service quality.
     """)
+    
+    # Dog Registry
+    st.subheader("Dog Registry")
+    
+    registry = get_registry()
+    if registry is None:
+        st.info("Set DOGGY_REGISTRY_PATH to a CSV export of the animal records to track them here.")
+    else:
+        registry_cities = st.multiselect("City:", registry.categories('city'))
+        registry_statuses = st.multiselect("Status:", registry.categories('status'))
+        
+        # Matching row indices are cached per session (evictable under memory pressure)
+        registry_filter = (tuple(registry_cities), tuple(registry_statuses))
+        cached_filter = st.session_state.get("cache:registry_rows")
+        if cached_filter is not None and cached_filter[0] == registry_filter:
+            registry_rows = cached_filter[1]
+        else:
+            criteria = {}
+            if registry_cities:
+                criteria['city'] = registry_cities
+            if registry_statuses:
+                criteria['status'] = registry_statuses
+            registry_rows = registry.select(**criteria)
+            st.session_state["cache:registry_rows"] = (registry_filter, registry_rows)
+            used, evicted = enforce_memory_budget()
+            session_bytes, evicted_keys = used, evicted_keys + evicted
+        
+        st.metric(
+            label="Dogs Matching Filters",
+            value=f"{len(registry_rows):,} of {len(registry):,}"
+        )
+        
+        status_counts = registry.counts('status', registry_rows)
+        fig_status = px.bar(
+            x=status_counts.index,
+            y=status_counts.values,
+            title='Dogs by Status',
+            labels={'x': 'Status', 'y': 'Number of Dogs'}
+        )
+        st.plotly_chart(fig_status, use_container_width=True)
+        
+        # Only the visible rows are materialised as a DataFrame
+        st.dataframe(registry.to_frame(registry_rows[:100]), use_container_width=True)
+    
+    # Session Memory
+    with st.expander("Session Memory"):
+        st.markdown(f"""
+        - **Budget per Session:** {memory_guard.budget_bytes / 1024 ** 2:,.1f} MB
+        - **This Session:** {session_bytes / 1024:,.1f} KB
+        - **Evicted This Run:** {', '.join(evicted_keys) if evicted_keys else 'nothing'}
+        """)
+        if registry is not None:
+            st.markdown(f"- **Shared Registry:** {registry.nbytes / 1024 ** 2:,.1f} MB for {len(registry):,} dogs")
+        memory_summary = memory_guard.summary()
+        st.markdown(f"""
+        - **Active Sessions:** {memory_summary['sessions']:,}
+        - **All Sessions:** {memory_summary['total_bytes'] / 1024 ** 2:,.1f} MB (largest {memory_summary['largest_bytes'] / 1024:,.1f} KB)
+        """)
 
 elif selection == "Risk Management":
     st.header("9. Risk Management")
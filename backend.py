@@ -0,0 +1,366 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from scenarios import canonicalize
+
+logger = logging.getLogger(__name__)
+
+# Shared store for multi-replica deployments: a Redis URL, or a file for tests and single hosts
+REDIS_URL = os.environ.get("DOGGY_REDIS_URL")
+SHARED_STORE_PATH = os.environ.get("DOGGY_SHARED_STORE")
+
+# Key signing job results; pickled results are only loaded when their signature matches
+SHARED_SECRET = os.environ.get("DOGGY_SHARED_SECRET")
+
+# Heavy jobs allowed to run at the same time across the whole cluster
+DEFAULT_MAX_RUNNING = int(os.environ.get("DOGGY_MAX_RUNNING_JOBS", "2"))
+
+# Claims and running slots expire this long after their last renewal, so the
+# work of a dead replica is taken over; live workers renew them every third of it
+DEFAULT_LEASE_SECONDS = 30
+
+# How long finished job results are kept
+DEFAULT_RESULT_TTL = 24 * 60 * 60
+
+POLL_INTERVAL = 0.05
+
+# Pause after a failed worker iteration, so a store outage is not retried and logged every poll
+RETRY_INTERVAL = 1.0
+
+
+class FileStore:
+    """File-backed stand-in for the subset of the Redis API used by the app.
+
+    Method names, arguments and return values follow redis-py (``get``,
+    ``set`` with ``ex``/``nx``, ``delete``, ``incr``, ``decr``, ``expire``,
+    ``lpush``, ``rpop``), so the app runs unchanged against either one.
+    Every replica that opens the same SQLite file shares its keys.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS lists (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lists_key ON lists (key, id);
+        """)
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _read(self, key):
+        row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row
+
+    def _live(self, key):
+        # Write path: expired keys are purged while the write lock is held
+        row = self._read(key)
+        if row is None:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        return row
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    def get(self, key):
+        # A single SELECT is its own consistent read under WAL; no write lock needed
+        with self._lock:
+            row = self._read(key)
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ex=None, nx=False):
+        def work():
+            if nx and self._live(key) is not None:
+                return None
+            expires_at = time.time() + ex if ex is not None else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, self._encode(value), expires_at),
+            )
+            return True
+        return self._transaction(work)
+
+    def delete(self, *keys):
+        def work():
+            removed = 0
+            for key in keys:
+                removed += self._conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount
+                removed += min(1, self._conn.execute("DELETE FROM lists WHERE key = ?", (key,)).rowcount)
+            return removed
+        return self._transaction(work)
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(self._read(key) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        def work():
+            if self._live(key) is None:
+                return False
+            self._conn.execute("UPDATE kv SET expires_at = ? WHERE key = ?", (time.time() + seconds, key))
+            return True
+        return self._transaction(work)
+
+    def incr(self, key, amount=1):
+        def work():
+            row = self._live(key)
+            value = (int(row[0]) if row is not None else 0) + amount
+            # Like Redis, INCR keeps the key's remaining time to live
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, str(value).encode("utf-8"), row[1] if row is not None else None),
+            )
+            return value
+        return self._transaction(work)
+
+    def decr(self, key, amount=1):
+        return self.incr(key, -amount)
+
+    def lpush(self, key, *values):
+        def work():
+            self._conn.executemany(
+                "INSERT INTO lists (key, value) VALUES (?, ?)", [(key, self._encode(value)) for value in values]
+            )
+            return self._conn.execute("SELECT COUNT(*) FROM lists WHERE key = ?", (key,)).fetchone()[0]
+        return self._transaction(work)
+
+    def rpop(self, key):
+        def work():
+            row = self._conn.execute(
+                "SELECT id, value FROM lists WHERE key = ? ORDER BY id LIMIT 1", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM lists WHERE id = ?", (row[0],))
+            return bytes(row[1])
+        return self._transaction(work)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def connect():
+    """Shared store configured for this deployment, or ``None`` for a single process.
+
+    Only shared scenarios and heavy job results live in the shared store.
+    Everything else stays with each replica: the donation ledger and the
+    clinic's appointment book are SQLite files (shared by replicas on one
+    host, not across hosts), the live feed's aggregates are held by the
+    replica that ingests the feed, and each session's scenario inputs
+    live in Streamlit session state, so the load balancer must keep a
+    session on one replica (sticky sessions).
+    """
+    if REDIS_URL:
+        import redis
+        return redis.Redis.from_url(REDIS_URL)
+    if SHARED_STORE_PATH:
+        return FileStore(SHARED_STORE_PATH)
+    return None
+
+
+def job_id(name, args):
+    payload = canonicalize({"name": name, "args": list(args)})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class JobQueue:
+    """Cluster-wide queue for heavy computations, run once and reused by every replica.
+
+    ``run`` returns a finished result from the shared store when there
+    is one. Otherwise it enqueues the job unless another replica already
+    has, then waits for the result. Worker threads in every replica pop
+    jobs and publish results with a TTL.
+
+    At most ``max_running`` jobs run at once across the cluster: a worker
+    first takes one of that many slot keys with ``SET NX EX``, then the
+    job's ``running`` lock the same way, so a job queued twice still runs
+    once. Every key is a lease: callers waiting in ``run`` renew the
+    claim of a queued job, and the worker renews its slot and lock while
+    the job runs. A dead replica's slot frees itself and its job is
+    queued again, while a slow queue or a long job is never taken over.
+    Queue entries are plain JSON naming a registered function, and
+    pickled results carry an HMAC signature that is checked before they
+    are loaded.
+    """
+
+    def __init__(self, store, namespace="doggy", max_running=DEFAULT_MAX_RUNNING,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, result_ttl=DEFAULT_RESULT_TTL, secret=SHARED_SECRET):
+        if not secret:
+            raise ValueError("JobQueue needs a shared secret (DOGGY_SHARED_SECRET) to sign results")
+        self.store = store
+        self.namespace = namespace
+        self.max_running = max_running
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self._functions = {}
+        self._stop = threading.Event()
+        self._workers = []
+
+    def _key(self, *parts):
+        return ":".join((self.namespace, "jobs") + parts)
+
+    def register(self, name, function):
+        self._functions[name] = function
+
+    def submit(self, name, *args):
+        """Enqueue ``name(*args)`` unless it is already finished or queued; returns the job id."""
+        if name not in self._functions:
+            raise KeyError(f"Unknown job: {name}")
+        job = job_id(name, args)
+        if self.store.get(self._key("result", job)) is None and \
+                self.store.set(self._key("claim", job), b"queued", ex=self.lease_seconds, nx=True):
+            self.store.lpush(self._key("queue"), canonicalize({"job": job, "name": name, "args": list(args)}))
+        return job
+
+    def _sign(self, job, data):
+        return hmac.new(self._secret, job.encode("utf-8") + data, hashlib.sha256).digest()
+
+    def _dump_result(self, job, outcome):
+        data = pickle.dumps(outcome)
+        return self._sign(job, data) + data
+
+    def _load_result(self, job, payload):
+        signature, data = payload[:32], payload[32:]
+        if not hmac.compare_digest(signature, self._sign(job, data)):
+            raise ValueError(f"Result of job {job} has an invalid signature")
+        return pickle.loads(data)
+
+    def run(self, name, *args, timeout=None):
+        """Result of ``name(*args)``; raises ``TimeoutError`` after ``timeout`` seconds."""
+        job = self.submit(name, *args)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            payload = self.store.get(self._key("result", job))
+            if payload is not None:
+                status, value = self._load_result(job, payload)
+                if status == "error":
+                    raise RuntimeError(f"Job {name} failed: {value}")
+                return value
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {name} did not finish in {timeout} seconds")
+            if not self.store.exists(self._key("running", job)):
+                # Keep the job's claim alive while it waits in the queue; it only
+                # lapses when its worker or every waiting caller is gone
+                if not self.store.expire(self._key("claim", job), self.lease_seconds):
+                    self.submit(name, *args)
+            # Without live workers in this process, help drain the queue instead of idling
+            if not any(worker.is_alive() for worker in self._workers) and self.work_once():
+                continue
+            time.sleep(POLL_INTERVAL)
+
+    def _acquire_slot(self):
+        token = uuid.uuid4().hex
+        for index in range(self.max_running):
+            slot = self._key("slot", str(index))
+            if self.store.set(slot, token, ex=self.lease_seconds, nx=True):
+                return slot, token
+        return None
+
+    def _release_slot(self, slot, token):
+        if self.store.get(slot) == token.encode("utf-8"):
+            self.store.delete(slot)
+
+    def _renew(self, done, *keys):
+        while not done.wait(self.lease_seconds / 3):
+            for key in keys:
+                self.store.expire(key, self.lease_seconds)
+
+    def work_once(self):
+        """Run at most one queued job; returns whether one was taken."""
+        acquired = self._acquire_slot()
+        if acquired is None:
+            return False
+        slot, token = acquired
+        try:
+            payload = self.store.rpop(self._key("queue"))
+            if payload is None:
+                return False
+            try:
+                entry = json.loads(payload)
+                job, name, args = str(entry["job"]), str(entry["name"]), list(entry["args"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Dropping malformed job queue entry: %r", payload[:200])
+                return True
+            if self.store.get(self._key("result", job)) is not None:
+                return True
+            # A job queued twice (e.g. re-queued by a caller) is run by one worker only
+            running = self._key("running", job)
+            if not self.store.set(running, token, ex=self.lease_seconds, nx=True):
+                return True
+            # From here the lock stands for the job; if this replica dies it lapses
+            # and the waiting callers find no claim, so they queue the job again
+            self.store.delete(self._key("claim", job))
+            # Keep the lock and the slot alive for as long as the job runs
+            done = threading.Event()
+            renewer = threading.Thread(target=self._renew, args=(done, running, slot), daemon=True)
+            renewer.start()
+            try:
+                outcome = ("ok", self._functions[name](*args))
+            except Exception as error:
+                outcome = ("error", repr(error))
+            finally:
+                done.set()
+                renewer.join()
+            try:
+                self.store.set(self._key("result", job), self._dump_result(job, outcome), ex=self.result_ttl)
+            finally:
+                self.store.delete(running)
+            return True
+        finally:
+            self._release_slot(slot, token)
+
+    def start_workers(self, count=1):
+        for index in range(count):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self.work_once():
+                    continue
+            except Exception:
+                # A store outage must not kill the worker; try again a little later
+                logger.exception("Job worker failed")
+                self._stop.wait(RETRY_INTERVAL)
+                continue
+            self._stop.wait(POLL_INTERVAL)
+
@@ -0,0 +1,260 @@
+import atexit
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Default location of the embedded ledger, overridable per deployment
+DEFAULT_LEDGER_PATH = os.environ.get("DOGGY_LEDGER_PATH", "donations.db")
+
+# Number of buffered donations that triggers an automatic flush
+DEFAULT_BATCH_SIZE = 500
+
+# Buffered donations older than this many seconds are flushed on the next write
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Largest single donation ($10bn); far below int64, so running totals cannot overflow
+MAX_AMOUNT_CENTS = 10 ** 12
+
+# Donation times are Unix timestamps in seconds within the range of datetime
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MIN_TIMESTAMP = int((datetime(1, 1, 2, tzinfo=timezone.utc) - EPOCH).total_seconds())
+MAX_TIMESTAMP = int((datetime(9999, 12, 31, tzinfo=timezone.utc) - EPOCH).total_seconds())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS donations (
+    id INTEGER PRIMARY KEY,
+    donor TEXT NOT NULL,
+    campaign TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL CHECK (amount_cents > 0),
+    donated_at INTEGER NOT NULL
+);
+
+-- Covering indexes: each query below is answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_donations_donor
+    ON donations (donor, donated_at, amount_cents);
+CREATE INDEX IF NOT EXISTS idx_donations_date
+    ON donations (donated_at, amount_cents);
+CREATE INDEX IF NOT EXISTS idx_donations_campaign
+    ON donations (campaign, donated_at, amount_cents);
+
+-- The ledger is append-only
+CREATE TRIGGER IF NOT EXISTS donations_no_update
+    BEFORE UPDATE ON donations
+    BEGIN SELECT RAISE(ABORT, 'donations ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS donations_no_delete
+    BEFORE DELETE ON donations
+    BEGIN SELECT RAISE(ABORT, 'donations ledger is append-only'); END;
+
+-- Running totals, maintained on every flush instead of summed on read.
+-- scope is one of 'all', 'donor', 'campaign' or 'day'.
+CREATE TABLE IF NOT EXISTS donation_totals (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    donations INTEGER NOT NULL,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+"""
+
+UPSERT_TOTAL = """
+INSERT INTO donation_totals (scope, key, amount_cents, donations)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (scope, key) DO UPDATE SET
+    amount_cents = amount_cents + excluded.amount_cents,
+    donations = donations + excluded.donations
+"""
+
+
+def _to_cents(amount):
+    amount = float(amount)
+    if not math.isfinite(amount):
+        raise ValueError("Donation amount must be a finite number")
+    return int(round(amount * 100))
+
+
+def _to_timestamp(donated_at):
+    if donated_at is None:
+        return int(time.time())
+    if isinstance(donated_at, datetime):
+        return int(donated_at.timestamp())
+    try:
+        return int(donated_at)
+    except OverflowError:
+        raise ValueError("Donation date is out of range") from None
+
+
+def _day_key(timestamp):
+    return (EPOCH + timedelta(seconds=timestamp)).strftime("%Y-%m-%d")
+
+
+def _to_row(donor, amount, campaign, donated_at):
+    """Validated ledger row; raises ``ValueError`` for a donation the ledger cannot store."""
+    amount_cents = _to_cents(amount)
+    if amount_cents <= 0:
+        raise ValueError("Donation amount must be positive")
+    if amount_cents > MAX_AMOUNT_CENTS:
+        raise ValueError(f"Donation amount must not exceed ${MAX_AMOUNT_CENTS // 100:,}")
+    timestamp = _to_timestamp(donated_at)
+    if not MIN_TIMESTAMP <= timestamp <= MAX_TIMESTAMP:
+        raise ValueError("Donation date is out of range (timestamps are in seconds)")
+    return (str(donor), str(campaign), amount_cents, timestamp)
+
+
+class DonationLedger:
+    """Append-only donation ledger stored in an embedded SQLite file.
+
+    A single connection is shared by every Streamlit session (see
+    ``get_ledger`` in app.py); access is serialised with a lock.
+    Donations are buffered and written in batches, and the running
+    totals are updated in the same transaction as the batch itself.
+    Reads flush the buffer first, and whatever is still buffered is
+    flushed when the interpreter exits.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending = []
+        self._oldest_pending = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        atexit.register(self._flush_at_exit)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except sqlite3.ProgrammingError:
+            pass  # already closed
+
+    def record(self, donor, amount, campaign="General", donated_at=None):
+        """Buffer one donation; flushes once the batch is full or has waited ``flush_interval`` seconds."""
+        row = _to_row(donor, amount, campaign, donated_at)
+        with self._lock:
+            if not self._pending:
+                self._oldest_pending = time.monotonic()
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size or \
+                    time.monotonic() - self._oldest_pending >= self.flush_interval:
+                self.flush()
+
+    def record_many(self, donations):
+        """Append an iterable of ``(donor, amount, campaign, donated_at)`` tuples.
+
+        Every tuple is validated first; if one is invalid, none is recorded.
+        """
+        rows = [_to_row(*donation) for donation in donations]
+        with self._lock:
+            self._pending.extend(rows)
+            self.flush()
+
+    def flush(self):
+        """Write all buffered donations and their running totals in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return 0
+
+            # Collapse the batch into one delta per totals key; rows were validated
+            # when recorded, and stay buffered until this succeeds
+            rows = self._pending
+            deltas = {}
+            for donor, campaign, amount_cents, donated_at in rows:
+                for key in (("all", ""), ("donor", donor), ("campaign", campaign),
+                            ("day", _day_key(donated_at))):
+                    amount, count = deltas.get(key, (0, 0))
+                    deltas[key] = (amount + amount_cents, count + 1)
+            self._pending = []
+            self._oldest_pending = None
+
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                # The database is busy or locked; keep the batch for the next flush
+                self._pending = rows + self._pending
+                self._oldest_pending = time.monotonic()
+                raise
+            try:
+                self._conn.executemany(
+                    "INSERT INTO donations (donor, campaign, amount_cents, donated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany(
+                    UPSERT_TOTAL,
+                    [(scope, key, amount, count) for (scope, key), (amount, count) in deltas.items()],
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.OperationalError:
+                self._conn.execute("ROLLBACK")
+                self._pending = rows + self._pending
+                self._oldest_pending = time.monotonic()
+                raise
+            except Exception:
+                # A permanent error would fail every retry and block all later
+                # donations, so the batch is not kept
+                self._conn.execute("ROLLBACK")
+                raise
+            return len(rows)
+
+    def _total(self, scope, key):
+        with self._lock:
+            self.flush()
+            row = self._conn.execute(
+                "SELECT amount_cents, donations FROM donation_totals WHERE scope = ? AND key = ?",
+                (scope, key),
+            ).fetchone()
+        if row is None:
+            return 0.0, 0
+        return row[0] / 100, row[1]
+
+    def total(self):
+        """Total donated amount and number of donations, read in constant time."""
+        return self._total("all", "")
+
+    def donor_total(self, donor):
+        return self._total("donor", str(donor))
+
+    def campaign_total(self, campaign):
+        return self._total("campaign", str(campaign))
+
+    def day_total(self, day):
+        return self._total("day", day)
+
+    def campaign_totals(self):
+        """Running totals for every campaign, largest first."""
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT key, amount_cents, donations FROM donation_totals "
+                "WHERE scope = 'campaign' ORDER BY amount_cents DESC"
+            ).fetchall()
+        return [(campaign, amount / 100, count) for campaign, amount, count in rows]
+
+    def donations_between(self, start, end, donor=None, campaign=None):
+        """Sum of donations in ``[start, end)``, optionally for a donor and/or a campaign."""
+        query = "SELECT COALESCE(SUM(amount_cents), 0), COUNT(*) FROM donations WHERE "
+        params = []
+        if donor is not None:
+            query += "donor = ? AND "
+            params.append(str(donor))
+        if campaign is not None:
+            query += "campaign = ? AND "
+            params.append(str(campaign))
+        query += "donated_at >= ? AND donated_at < ?"
+        params += [_to_timestamp(start), _to_timestamp(end)]
+        with self._lock:
+            self.flush()
+            amount, count = self._conn.execute(query, params).fetchone()
+        return amount / 100, count
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
@@ -0,0 +1,293 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from donations import MAX_AMOUNT_CENTS, MAX_TIMESTAMP, MIN_TIMESTAMP
+
+logger = logging.getLogger(__name__)
+
+# Local event sources for the live feed (JSON lines, one donation per line)
+FEED_FILE = os.environ.get("DOGGY_FEED_FILE")
+FEED_PORT = os.environ.get("DOGGY_FEED_PORT")
+
+# Micro-batching: flush after this many events or this many seconds
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_INTERVAL = 0.25
+
+# Events buffered between the sources and the batcher; sources wait when it is full
+DEFAULT_QUEUE_SIZE = 10000
+
+# Number of per-minute buckets kept in the sliding window
+DEFAULT_WINDOW_MINUTES = 60
+
+
+def parse_event(line):
+    """Parse ``{"donor": ..., "amount": ..., "campaign": ..., "ts": ...}``.
+
+    Returns ``(donor, amount, campaign, ts)`` or ``None`` for a malformed line,
+    including events the ledger would reject: amounts that are not finite,
+    below one cent or above ``MAX_AMOUNT_CENTS``, and ``ts`` values outside
+    the range of Unix timestamps in seconds (e.g. milliseconds).
+    """
+    try:
+        event = json.loads(line)
+        amount = float(event["amount"])
+        ts = event.get("ts")
+        ts = int(ts) if ts is not None else int(time.time())
+    except (ValueError, KeyError, TypeError, AttributeError, OverflowError):
+        return None
+    if not math.isfinite(amount) or not 1 <= round(amount * 100) <= MAX_AMOUNT_CENTS:
+        return None
+    if not MIN_TIMESTAMP <= ts <= MAX_TIMESTAMP:
+        return None
+    return (
+        str(event.get("donor") or "Anonymous"),
+        amount,
+        str(event.get("campaign") or "General"),
+        ts,
+    )
+
+
+class Subscription:
+    """Per-session inbox; successive deltas are merged until the session reads them.
+
+    ``snapshot`` holds the aggregates at the moment of subscribing, so
+    the snapshot plus every delta received afterwards is never missing
+    or double-counting an event.
+    """
+
+    def __init__(self, feed, snapshot):
+        self._feed = feed
+        self.snapshot = snapshot
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._delta = None
+
+    def _push(self, delta):
+        with self._lock:
+            if self._delta is None:
+                self._delta = _empty_delta()
+            merge_delta(self._delta, delta)
+            self._ready.set()
+
+    def wait(self, timeout=None):
+        """Block until a delta is available (or timeout) and return it, else ``None``."""
+        if not self._ready.wait(timeout):
+            return None
+        with self._lock:
+            delta, self._delta = self._delta, None
+            self._ready.clear()
+        return delta
+
+    def close(self):
+        self._feed.unsubscribe(self)
+
+
+def _empty_delta():
+    return {"amount": 0.0, "count": 0, "campaigns": {}, "minutes": {}}
+
+
+def merge_delta(target, delta):
+    """Add a pushed delta into a snapshot-shaped dict in place."""
+    target["amount"] += delta["amount"]
+    target["count"] += delta["count"]
+    for bucket in ("campaigns", "minutes"):
+        for key, (amount, count) in delta[bucket].items():
+            old_amount, old_count = target[bucket].get(key, (0.0, 0))
+            target[bucket][key] = (old_amount + amount, old_count + count)
+
+
+class DonationFeed:
+    """Asyncio ingestion of live donations into the ledger.
+
+    Events from a tailed file and/or a TCP socket are micro-batched,
+    appended to the ledger in one write per batch, folded into
+    per-minute and per-campaign aggregates and pushed as deltas to
+    every open session. The event loop runs in its own daemon thread
+    so Streamlit reruns are never blocked by ingestion.
+    """
+
+    def __init__(self, ledger, batch_size=DEFAULT_BATCH_SIZE, batch_interval=DEFAULT_BATCH_INTERVAL,
+                 window_minutes=DEFAULT_WINDOW_MINUTES, queue_size=DEFAULT_QUEUE_SIZE):
+        self.ledger = ledger
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.batch_interval = batch_interval
+        self.window_minutes = window_minutes
+
+        self._lock = threading.Lock()
+        # Sessions interrupted by a rerun before closing their subscription are dropped with it
+        self._subscribers = weakref.WeakSet()
+        self._total_amount, self._total_count = ledger.total()
+        self._campaigns = {
+            campaign: (amount, count) for campaign, amount, count in ledger.campaign_totals()
+        }
+        self._minutes = OrderedDict()
+
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._ready = threading.Event()
+
+    # Aggregates
+
+    def snapshot(self):
+        """Current totals and windowed aggregates as a plain dict."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            "amount": self._total_amount,
+            "count": self._total_count,
+            "campaigns": dict(self._campaigns),
+            "minutes": dict(self._minutes),
+        }
+
+    def publish(self, events):
+        """Fold parsed events into the aggregates and push the delta to every session."""
+        delta = _empty_delta()
+        for _donor, amount, campaign, ts in events:
+            minute = ts - ts % 60
+            delta["amount"] += amount
+            delta["count"] += 1
+            for bucket, key in (("campaigns", campaign), ("minutes", minute)):
+                old_amount, old_count = delta[bucket].get(key, (0.0, 0))
+                delta[bucket][key] = (old_amount + amount, old_count + 1)
+
+        with self._lock:
+            self._total_amount += delta["amount"]
+            self._total_count += delta["count"]
+            for bucket, store in (("campaigns", self._campaigns), ("minutes", self._minutes)):
+                for key, (amount, count) in delta[bucket].items():
+                    old_amount, old_count = store.get(key, (0.0, 0))
+                    store[key] = (old_amount + amount, old_count + count)
+            # Keep only the most recent minutes in the sliding window
+            if len(self._minutes) > self.window_minutes:
+                for minute in sorted(self._minutes)[:-self.window_minutes]:
+                    del self._minutes[minute]
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            subscription._push(delta)
+        return delta
+
+    # Sessions
+
+    def subscribe(self):
+        """Open a subscription; its ``snapshot`` is taken atomically with registering it."""
+        with self._lock:
+            subscription = Subscription(self, self._snapshot())
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    # Ingestion
+
+    def start(self, path=None, port=None, host="127.0.0.1"):
+        """Start the ingestion loop in a background thread."""
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(
+            target=self._run, args=(path, port, host), name="donation-feed", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, line):
+        """Feed one raw event line from another thread (used for testing).
+
+        Returns a ``concurrent.futures.Future`` that completes once the line is queued.
+        """
+        return asyncio.run_coroutine_threadsafe(self._queue.put(line), self._loop)
+
+    def _run(self, path, port, host):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        tasks = [self._loop.create_task(self._batcher())]
+        if path:
+            tasks.append(self._loop.create_task(self._tail(path)))
+        if port:
+            tasks.append(self._loop.create_task(self._serve(host, int(port))))
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _tail(self, path):
+        # Follow the file like `tail -f`, starting at its current end
+        while not os.path.exists(path):
+            await asyncio.sleep(self.batch_interval)
+        with open(path, "r", encoding="utf-8") as source:
+            source.seek(0, os.SEEK_END)
+            partial = ""
+            while True:
+                chunk = source.read(1 << 16)
+                if not chunk:
+                    await asyncio.sleep(self.batch_interval / 5)
+                    continue
+                lines = (partial + chunk).split("\n")
+                partial = lines.pop()
+                for line in lines:
+                    if line:
+                        await self._queue.put(line)
+
+    async def _serve(self, host, port):
+        async def handle(reader, writer):
+            try:
+                async for line in reader:
+                    await self._queue.put(line.decode("utf-8", "replace"))
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _batcher(self):
+        while True:
+            lines = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_interval
+            while len(lines) < self.batch_size:
+                if self._queue.empty():
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        lines.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    lines.append(self._queue.get_nowait())
+
+            events = [event for event in map(parse_event, lines) if event is not None]
+            if not events:
+                continue
+            # One failing batch must not stop ingestion of the ones behind it
+            try:
+                # The SQLite write runs off the event loop so sockets keep draining
+                await self._loop.run_in_executor(None, self.ledger.record_many, events)
+                self.publish(events)
+            except Exception:
+                logger.exception("Failed to ingest a batch of %d donations", len(events))
@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Per-session memory budget; 2 GB shared by 500 concurrent sessions leaves about 4 MB each
+DEFAULT_BUDGET_MB = float(os.environ.get("DOGGY_SESSION_BUDGET_MB", "4"))
+
+# Session-state keys with this prefix hold cached data that may be evicted
+EVICTABLE_PREFIX = "cache:"
+
+# Sessions that have not rerun for this long are dropped from the summary
+SESSION_TTL_SECONDS = 30 * 60
+
+
+def estimate_size(obj, _seen=None):
+    """Approximate number of bytes held by ``obj`` and everything it references."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, _seen) + estimate_size(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+class SessionMemoryGuard:
+    """Tracks the memory held in each session's state and enforces a budget.
+
+    ``enforce`` is called on every script run. It measures the session's
+    state, records it for the cross-session summary, and evicts evictable
+    entries (keys starting with ``cache:``), largest first, until the
+    session fits its budget. Data shared across sessions, such as the
+    dog registry, lives in ``st.cache_resource`` and is not counted.
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def measure(self, session_state):
+        return {key: estimate_size(session_state[key]) for key in list(session_state.keys())}
+
+    def enforce(self, session_id, session_state):
+        """Evict cached entries over budget; returns ``(bytes_used, evicted_keys)``."""
+        sizes = self.measure(session_state)
+        used = sum(sizes.values())
+        evicted = []
+        evictable = sorted(
+            (key for key in sizes if str(key).startswith(EVICTABLE_PREFIX)),
+            key=sizes.get,
+            reverse=True,
+        )
+        for key in evictable:
+            if used <= self.budget_bytes:
+                break
+            del session_state[key]
+            used -= sizes[key]
+            evicted.append(key)
+
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (used, now)
+            for stale in [sid for sid, (_, seen) in self._sessions.items() if now - seen > SESSION_TTL_SECONDS]:
+                del self._sessions[stale]
+        return used, evicted
+
+    def summary(self):
+        """Aggregate memory of recently active sessions; session ids are never exposed."""
+        with self._lock:
+            used = [used for used, _ in self._sessions.values()]
+        return {
+            "sessions": len(used),
+            "total_bytes": sum(used),
+            "largest_bytes": max(used, default=0),
+        }
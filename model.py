@@ -0,0 +1,133 @@
+import pandas as pd
+import plotly.express as px
+
+# Define budget categories
+budget_categories = ['Construction', 'Equipment', 'Staffing', 'Operations', 'Programs', 'Contingency']
+default_budget = {
+    'Construction': 60000,
+    'Equipment': 25000,
+    'Staffing': 80000,
+    'Operations': 22500,
+    'Programs': 17500,
+    'Contingency': 10000
+}
+total_budget = 250000
+
+# Define revenue categories
+revenue_categories = ['Adoption Fees', 'Merchandise Sales', 'Veterinary Services', 'Grooming Services', 'Training Programs', 'Other']
+default_revenue = {
+    'Adoption Fees': 20,          # in Euros per adoption
+    'Merchandise Sales': 10,      # average price per item
+    'Veterinary Services': 50,    # average fee per service
+    'Grooming Services': 30,      # average fee per grooming session
+    'Training Programs': 100,     # average fee per training session
+    'Other': 0                    # placeholder for additional revenue streams
+}
+
+# Expected monthly units for each revenue stream ('Other' is a monthly amount in Euros)
+default_units = {
+    'Adoption Fees': 50,
+    'Merchandise Sales': 100,
+    'Veterinary Services': 20,
+    'Grooming Services': 30,
+    'Training Programs': 10,
+    'Other': 0
+}
+
+# Define allocation categories (these should align with your budget or operational needs)
+allocation_categories = ['Dog Care', 'Facility Maintenance', 'Staff Salaries', 'Operational Costs', 'Emergency Fund', 'Other']
+
+# Default allocation percentages
+default_allocation = {
+    'Dog Care': 50,            # 50%
+    'Facility Maintenance': 15, # 15%
+    'Staff Salaries': 20,      # 20%
+    'Operational Costs': 10,   # 10%
+    'Emergency Fund': 3,       # 3%
+    'Other': 2                 # 2%
+}
+
+# Full input vector of the interactive model with its default values
+default_inputs = {
+    'budget_allocation': default_budget,
+    'revenue_input': default_revenue,
+    'expected_units': default_units,
+    'allocation_percentages': default_allocation,
+}
+
+
+def compute_budget(budget_allocation):
+    """Budget table and pie chart for a budget allocation."""
+    # Convert to DataFrame for display
+    budget_df = pd.DataFrame({
+        'Category': list(budget_allocation.keys()),
+        'Amount (USD)': list(budget_allocation.values())
+    })
+
+    fig_budget = px.pie(
+        budget_df,
+        values='Amount (USD)',
+        names='Category',
+        title='Budget Allocation',
+        hole=0.4
+    )
+    return {'frames': {'budget': budget_df}, 'figures': {'budget': fig_budget}}
+
+
+def compute_revenue(revenue_input, expected_units, allocation_percentages):
+    """Revenue, allocation and allocated-funds tables plus the allocation pie chart."""
+    # Calculate monthly revenue for each stream
+    monthly_revenue = {}
+    for category in revenue_categories:
+        if category == 'Other':
+            monthly_revenue[category] = expected_units[category]
+        else:
+            monthly_revenue[category] = revenue_input[category] * expected_units[category]
+
+    revenue_df = pd.DataFrame({
+        'Revenue Stream': list(monthly_revenue.keys()),
+        'Monthly Revenue (Euros)': list(monthly_revenue.values())
+    })
+
+    total_annual_revenue = sum(monthly_revenue.values()) * 12
+
+    allocation_df = pd.DataFrame({
+        'Category': list(allocation_percentages.keys()),
+        'Percentage (%)': list(allocation_percentages.values())
+    })
+
+    # Calculate allocated funds
+    allocated_funds = {}
+    for category in allocation_categories:
+        allocated_funds[category] = (allocation_percentages[category] / 100) * total_annual_revenue
+
+    allocated_funds_df = pd.DataFrame({
+        'Allocation Category': list(allocated_funds.keys()),
+        'Annual Allocation (Euros)': list(allocated_funds.values())
+    })
+
+    fig_allocation = px.pie(
+        allocated_funds_df,
+        values='Annual Allocation (Euros)',
+        names='Allocation Category',
+        title='Annual Revenue Allocation',
+        hole=0.4
+    )
+    return {
+        'frames': {
+            'revenue': revenue_df,
+            'allocation': allocation_df,
+            'allocated_funds': allocated_funds_df,
+        },
+        'figures': {'allocation': fig_allocation},
+    }
+
+
+def compute_all(inputs):
+    """Every precomputed result of the model for a full input vector."""
+    budget = compute_budget(inputs['budget_allocation'])
+    revenue = compute_revenue(inputs['revenue_input'], inputs['expected_units'], inputs['allocation_percentages'])
+    return {
+        'frames': {**budget['frames'], **revenue['frames']},
+        'figures': {**budget['figures'], **revenue['figures']},
+    }
@@ -0,0 +1,163 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# CSV export of the shelter's animal records, overridable per deployment
+REGISTRY_PATH = os.environ.get("DOGGY_REGISTRY_PATH")
+
+EPOCH = date(1970, 1, 1)
+
+# Sentinel for a missing date (e.g. a dog that has not left the shelter yet)
+NO_DATE = np.int32(-1)
+
+# Sentinel for a missing integer (e.g. an unknown age); shown as <NA>, never as -1
+NO_VALUE = -1
+
+# Categorical fields are stored as small-int codes into a shared vocabulary
+CATEGORICAL_FIELDS = {
+    'name': np.int32,
+    'breed': np.int16,
+    'city': np.int16,
+    'status': np.int8,
+    'sex': np.int8,
+}
+# Dates are stored as int32 days since 1970-01-01
+DATE_FIELDS = ('intake_date', 'outcome_date')
+NUMERIC_FIELDS = {
+    'dog_id': np.int32,
+    'age_months': np.int16,
+    'weight_kg': np.float32,
+}
+FIELDS = ('dog_id',) + tuple(CATEGORICAL_FIELDS) + DATE_FIELDS + ('age_months', 'weight_kg')
+
+
+def _to_days(values):
+    dates = pd.to_datetime(pd.Series(values), errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    return np.where(dates.isna().to_numpy(), NO_DATE, days).astype(np.int32)
+
+
+class DogRecord:
+    """Read-only view of one row of a ``DogRegistry``; holds no data of its own."""
+
+    __slots__ = ('_registry', '_row')
+
+    def __init__(self, registry, row):
+        self._registry = registry
+        self._row = row
+
+    def __getattr__(self, field):
+        if field not in FIELDS:
+            raise AttributeError(field)
+        return self._registry.value(field, self._row)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f"DogRecord({self.to_dict()!r})"
+
+
+class DogRegistry:
+    """Columnar animal registry backed by typed NumPy arrays.
+
+    Categorical fields (name, breed, city, status, sex) are small-int
+    codes into per-field vocabularies and dates are int32 days since
+    1970-01-01, so a record costs about 30 bytes. The arrays are marked
+    read-only so one registry can be shared by every session.
+    """
+
+    def __init__(self, columns, categories):
+        self._columns = columns
+        self._categories = categories
+        for array in columns.values():
+            array.setflags(write=False)
+        self._size = len(columns['dog_id'])
+
+    @classmethod
+    def from_frame(cls, df):
+        columns, categories = {}, {}
+        for field, dtype in NUMERIC_FIELDS.items():
+            values = df[field]
+            if np.issubdtype(dtype, np.integer):
+                values = values.fillna(NO_VALUE)
+            columns[field] = values.to_numpy(dtype=dtype)
+        for field, dtype in CATEGORICAL_FIELDS.items():
+            values = df[field].astype('category')
+            if values.isna().any():
+                values = values.cat.add_categories('Unknown').fillna('Unknown')
+            columns[field] = values.cat.codes.to_numpy(dtype=dtype)
+            categories[field] = list(values.cat.categories)
+        for field in DATE_FIELDS:
+            columns[field] = _to_days(df[field])
+        return cls(columns, categories)
+
+    @classmethod
+    def from_csv(cls, path):
+        # Categorical dtypes keep the parsed frame compact before encoding
+        dtype = {field: 'category' for field in CATEGORICAL_FIELDS}
+        return cls.from_frame(pd.read_csv(path, usecols=list(FIELDS), dtype=dtype))
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        if not -self._size <= row < self._size:
+            raise IndexError(row)
+        return DogRecord(self, row % self._size)
+
+    def __iter__(self):
+        return (DogRecord(self, row) for row in range(self._size))
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._columns.values())
+
+    def categories(self, field):
+        return list(self._categories[field])
+
+    def value(self, field, row):
+        raw = self._columns[field][row]
+        if field in CATEGORICAL_FIELDS:
+            return self._categories[field][raw]
+        if field in DATE_FIELDS:
+            return None if raw == NO_DATE else EPOCH + timedelta(days=int(raw))
+        if np.issubdtype(raw.dtype, np.integer) and raw == NO_VALUE:
+            return None
+        return raw.item()
+
+    def select(self, **criteria):
+        """Row indices matching ``field=value`` (or ``field=[values]``) on categorical fields."""
+        mask = np.ones(self._size, dtype=bool)
+        for field, wanted in criteria.items():
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            vocabulary = self._categories[field]
+            codes = [vocabulary.index(value) for value in wanted if value in vocabulary]
+            mask &= np.isin(self._columns[field], codes)
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def counts(self, field, rows=None):
+        """Number of records per category, computed on the codes."""
+        codes = self._columns[field] if rows is None else self._columns[field][rows]
+        counts = np.bincount(codes, minlength=len(self._categories[field]))
+        return pd.Series(counts, index=self._categories[field], name=field)
+
+    def to_frame(self, rows=None):
+        """DataFrame view with categorical and datetime columns (optionally for some rows)."""
+        take = (lambda array: array) if rows is None else (lambda array: array[rows])
+        data = {}
+        for field in FIELDS:
+            array = take(self._columns[field])
+            if field in CATEGORICAL_FIELDS:
+                data[field] = pd.Categorical.from_codes(array, self._categories[field])
+            elif field in DATE_FIELDS:
+                dates = pd.to_datetime(array.astype('int64'), unit='D')
+                data[field] = dates.where(array != NO_DATE)
+            elif np.issubdtype(array.dtype, np.integer):
+                # Nullable integers, so missing values are not displayed as the sentinel
+                data[field] = pd.arrays.IntegerArray(array.copy(), array == NO_VALUE)
+            else:
+                data[field] = array
+        return pd.DataFrame(data)
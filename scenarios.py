@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+
+# Default location of the scenario store, overridable per deployment
+DEFAULT_SCENARIO_PATH = os.environ.get("DOGGY_SCENARIO_PATH", "scenarios.db")
+
+# Length of the hex digest used in shareable links
+HASH_LENGTH = 16
+
+# Decoded scenarios kept in memory; shared links concentrate on a handful of hashes
+DEFAULT_CACHE_SIZE = 64
+
+
+def _canonical_value(value):
+    if isinstance(value, dict):
+        return {str(key): _canonical_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    # Widgets return ints, floats and numpy scalars; 50, 50.0 and np.int64(50) are one input
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def canonicalize(inputs):
+    """Canonical JSON encoding of an input vector (sorted keys, normalised numbers)."""
+    return json.dumps(_canonical_value(inputs), sort_keys=True, separators=(",", ":"))
+
+
+def same_inputs(left, right):
+    return canonicalize(left) == canonicalize(right)
+
+
+def scenario_hash(inputs):
+    return hashlib.sha256(canonicalize(inputs).encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def encode_results(results):
+    """Serialise ``{'frames': {...DataFrame}, 'figures': {...Figure}}`` to plain JSON data."""
+    return {
+        "frames": {
+            name: json.loads(frame.to_json(orient="split", index=False))
+            for name, frame in results["frames"].items()
+        },
+        "figures": {name: figure.to_json() for name, figure in results["figures"].items()},
+    }
+
+
+def decode_results(payload):
+    return {
+        "frames": {
+            name: pd.DataFrame(frame["data"], columns=frame["columns"])
+            for name, frame in payload["frames"].items()
+        },
+        "figures": {name: pio.from_json(figure) for name, figure in payload["figures"].items()},
+    }
+
+
+class Scenario:
+    __slots__ = ("scenario_id", "inputs", "results")
+
+    def __init__(self, scenario_id, inputs, results):
+        self.scenario_id = scenario_id
+        self.inputs = inputs
+        self.results = results
+
+
+class ScenarioStore:
+    """Content-addressed store of input vectors and their precomputed results.
+
+    Each scenario is keyed by the hash of its canonical inputs and stored
+    as one zlib-compressed JSON blob in an SQLite file. Saving the same
+    inputs twice is a no-op. Loaded scenarios are kept decoded in a small
+    LRU, so a popular shared link is served from memory.
+    """
+
+    def __init__(self, path=DEFAULT_SCENARIO_PATH, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scenarios (id TEXT PRIMARY KEY, payload BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _exists(self, scenario_id):
+        return self._conn.execute(
+            "SELECT 1 FROM scenarios WHERE id = ?", (scenario_id,)
+        ).fetchone() is not None
+
+    def _read(self, scenario_id):
+        row = self._conn.execute(
+            "SELECT payload FROM scenarios WHERE id = ?", (scenario_id,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, scenario_id, blob):
+        self._conn.execute("INSERT OR IGNORE INTO scenarios (id, payload) VALUES (?, ?)", (scenario_id, blob))
+        self._conn.commit()
+
+    def save(self, inputs, compute):
+        """Store ``inputs`` with ``compute(inputs)`` and return the scenario id.
+
+        ``compute`` is only called when the scenario is not stored yet.
+        """
+        scenario_id = scenario_hash(inputs)
+        with self._lock:
+            if not self._exists(scenario_id):
+                payload = {
+                    "inputs": json.loads(canonicalize(inputs)),
+                    "results": encode_results(compute(inputs)),
+                }
+                blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 9)
+                self._write(scenario_id, blob)
+        return scenario_id
+
+    def load(self, scenario_id):
+        """Return the stored ``Scenario`` or ``None`` for an unknown id."""
+        with self._lock:
+            scenario = self._cache.get(scenario_id)
+            if scenario is not None:
+                self._cache.move_to_end(scenario_id)
+                return scenario
+            blob = self._read(scenario_id)
+        if blob is None:
+            return None
+
+        payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+        scenario = Scenario(scenario_id, payload["inputs"], decode_results(payload["results"]))
+        with self._lock:
+            self._cache[scenario_id] = scenario
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scenario
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SharedScenarioStore(ScenarioStore):
+    """Scenario store kept in a Redis-protocol shared store, for multi-replica deployments."""
+
+    def __init__(self, store, namespace="doggy", cache_size=DEFAULT_CACHE_SIZE):
+        self.store = store
+        self.namespace = namespace
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def _key(self, scenario_id):
+        return f"{self.namespace}:scenario:{scenario_id}"
+
+    def _exists(self, scenario_id):
+        return bool(self.store.exists(self._key(scenario_id)))
+
+    def _read(self, scenario_id):
+        return self.store.get(self._key(scenario_id))
+
+    def _write(self, scenario_id, blob):
+        # Content-addressed, so a concurrent writer of the same id stores the same bytes
+        self.store.set(self._key(scenario_id), blob, nx=True)
+
+    def close(self):
+        pass
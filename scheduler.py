@@ -0,0 +1,300 @@
+import logging
+import os
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Default location of the appointment book, overridable per deployment
+DEFAULT_CLINIC_PATH = os.environ.get("DOGGY_CLINIC_PATH", "clinic.db")
+
+# Two examination rooms and one surgical suite (see 4.1 Shelter Facilities)
+ROOMS = ('Examination Room 1', 'Examination Room 2', 'Surgical Suite')
+
+# Appointment types; every one of them is billed as a veterinary service
+SERVICES = ('Examination', 'Vaccination', 'Treatment', 'Surgery')
+REVENUE_STREAM = 'Veterinary Services'
+
+# Clinic opening hours, as (opening hour, closing hour)
+OPENING_HOURS = (9, 18)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_minutes(moment):
+    """Minutes since 1970-01-01 for a naive datetime."""
+    return int((moment - EPOCH).total_seconds() // 60)
+
+
+def from_minutes(minutes):
+    return EPOCH + timedelta(minutes=int(minutes))
+
+
+class Booking:
+    __slots__ = ('booking_id', 'room', 'start', 'end', 'service', 'dog')
+
+    def __init__(self, booking_id, room, start, end, service, dog):
+        self.booking_id = booking_id
+        self.room = room
+        self.start = start
+        self.end = end
+        self.service = service
+        self.dog = dog
+
+    @property
+    def start_time(self):
+        return from_minutes(self.start)
+
+    @property
+    def end_time(self):
+        return from_minutes(self.end)
+
+
+class RoomSchedule:
+    """Bookings of one room, as disjoint half-open intervals ``[start, end)``.
+
+    A room cannot be double-booked, so its interval tree degenerates into
+    a sorted list of disjoint intervals. Starts and ends are then sorted
+    together, and conflicts, gaps and busy time are found by binary
+    search. Cumulative booked minutes are rebuilt lazily after changes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._starts = []
+        self._ends = []
+        self._bookings = []
+        self._cumulative = None
+
+    def __len__(self):
+        return len(self._bookings)
+
+    def bookings(self, start=None, end=None):
+        """Bookings overlapping ``[start, end)`` in time order (all when unbounded)."""
+        lo = 0 if start is None else bisect_right(self._ends, start)
+        hi = len(self._starts) if end is None else bisect_left(self._starts, end)
+        return self._bookings[lo:hi]
+
+    def conflicts(self, start, end):
+        return self.bookings(start, end)
+
+    def is_free(self, start, end):
+        return bisect_right(self._ends, start) >= bisect_left(self._starts, end)
+
+    def add(self, booking):
+        if booking.end <= booking.start:
+            raise ValueError("An appointment must end after it starts")
+        if not self.is_free(booking.start, booking.end):
+            raise ValueError(f"{self.name} is already booked at {booking.start_time:%Y-%m-%d %H:%M}")
+        index = bisect_left(self._starts, booking.start)
+        self._starts.insert(index, booking.start)
+        self._ends.insert(index, booking.end)
+        self._bookings.insert(index, booking)
+        self._cumulative = None
+
+    def remove(self, booking):
+        index = bisect_left(self._starts, booking.start)
+        if index == len(self._bookings) or self._bookings[index] is not booking:
+            raise ValueError("Booking is not in this room")
+        del self._starts[index], self._ends[index], self._bookings[index]
+        self._cumulative = None
+
+    def next_free_slot(self, after, duration, opening_hours=OPENING_HOURS):
+        """Earliest start ``>= after`` of a free ``duration``-minute slot within opening hours."""
+        opening, closing = opening_hours[0] * 60, opening_hours[1] * 60
+        if duration > closing - opening:
+            raise ValueError("The appointment is longer than the clinic's opening hours")
+        candidate = after
+        while True:
+            # Move the candidate into opening hours
+            minute_of_day = candidate % 1440
+            if minute_of_day < opening:
+                candidate += opening - minute_of_day
+            elif minute_of_day + duration > closing:
+                candidate += 1440 - minute_of_day + opening
+            # Jump past the booking that blocks it, if any
+            index = bisect_right(self._ends, candidate)
+            if index < len(self._starts) and self._starts[index] < candidate + duration:
+                candidate = self._ends[index]
+                continue
+            return candidate
+
+    def busy_minutes(self, start, end):
+        """Booked minutes within ``[start, end)``."""
+        if self._cumulative is None:
+            durations = np.asarray(self._ends, dtype=np.int64) - np.asarray(self._starts, dtype=np.int64)
+            self._cumulative = np.concatenate([[0], np.cumsum(durations)])
+        lo = bisect_right(self._ends, start)
+        hi = bisect_left(self._starts, end)
+        if lo >= hi:
+            return 0
+        busy = int(self._cumulative[hi] - self._cumulative[lo])
+        # Trim the bookings that straddle the window edges
+        busy -= max(0, start - self._starts[lo])
+        busy -= max(0, self._ends[hi - 1] - end)
+        return busy
+
+    def count_between(self, start, end, ended_by=None):
+        """Number of bookings starting within ``[start, end)``, optionally only those over by ``ended_by``."""
+        lo, hi = bisect_left(self._starts, start), bisect_left(self._starts, end)
+        if ended_by is not None:
+            # Disjoint intervals have their ends in the same order as their starts
+            hi = min(hi, bisect_right(self._ends, ended_by))
+        return max(0, hi - lo)
+
+
+class ClinicScheduler:
+    """Appointment book for the shelter's veterinary clinic.
+
+    Bookings are persisted in an SQLite file and indexed per room in
+    memory. The app shares one scheduler across sessions through
+    st.cache_resource, and access is serialised with a lock. The file is
+    the source of truth: a booking is checked for conflicts and inserted
+    in one write transaction, and the in-memory index is reloaded
+    whenever another process has changed the file.
+    """
+
+    def __init__(self, path=DEFAULT_CLINIC_PATH, rooms=ROOMS, opening_hours=OPENING_HOURS):
+        self._lock = threading.RLock()
+        self.opening_hours = opening_hours
+        self.rooms = {room: RoomSchedule(room) for room in rooms}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS appointments (
+                id INTEGER PRIMARY KEY, room TEXT NOT NULL, start INTEGER NOT NULL,
+                end INTEGER NOT NULL, service TEXT NOT NULL, dog TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_appointments_room ON appointments (room, start, end);
+        """)
+        self._data_version = None
+        self._sync()
+
+    def _sync(self):
+        """Reload the index if another connection has committed since the last load."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rooms = {room: RoomSchedule(room) for room in self.rooms}
+        rows = self._conn.execute(
+            "SELECT id, room, start, end, service, dog FROM appointments ORDER BY start"
+        ).fetchall()
+        for row in rows:
+            if row[1] not in rooms:
+                continue
+            try:
+                rooms[row[1]].add(Booking(*row))
+            except ValueError as error:
+                # Rows written before conflicts were checked in the database
+                logger.warning("Skipping appointment %s: %s", row[0], error)
+        self.rooms = rooms
+        self._data_version = data_version
+
+    def _check_opening_hours(self, begin, end):
+        opening, closing = self.opening_hours[0] * 60, self.opening_hours[1] * 60
+        day = begin - begin % 1440
+        if begin < day + opening or end > day + closing:
+            raise ValueError(
+                f"Appointments must be within opening hours "
+                f"({self.opening_hours[0]:02d}:00-{self.opening_hours[1]:02d}:00)"
+            )
+
+    def book(self, room, start, duration, service, dog=None):
+        """Book ``room`` from ``start`` (a datetime) for ``duration`` minutes within opening hours."""
+        if room not in self.rooms:
+            raise ValueError(f"Unknown room: {room}")
+        begin = to_minutes(start)
+        booking = Booking(None, room, begin, begin + int(duration), service, dog)
+        if booking.end <= booking.start:
+            raise ValueError("An appointment must end after it starts")
+        self._check_opening_hours(booking.start, booking.end)
+        with self._lock:
+            # The write lock is held from the conflict check to the commit, so two
+            # processes cannot both see the slot as free
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                # Bookings are disjoint, so only the last one starting before the new end can overlap
+                row = self._conn.execute(
+                    "SELECT end FROM appointments WHERE room = ? AND start < ? ORDER BY start DESC LIMIT 1",
+                    (room, booking.end),
+                ).fetchone()
+                if row is not None and row[0] > booking.start:
+                    raise ValueError(f"{room} is already booked at {booking.start_time:%Y-%m-%d %H:%M}")
+                cursor = self._conn.execute(
+                    "INSERT INTO appointments (room, start, end, service, dog) VALUES (?, ?, ?, ?, ?)",
+                    (room, booking.start, booking.end, service, dog),
+                )
+                booking.booking_id = cursor.lastrowid
+                self.rooms[room].add(booking)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._data_version = None
+                raise
+            self._conn.execute("COMMIT")
+        return booking
+
+    def cancel(self, booking):
+        with self._lock:
+            self._conn.execute("DELETE FROM appointments WHERE id = ?", (booking.booking_id,))
+            self._sync()
+            schedule = self.rooms[booking.room]
+            for stored in schedule.bookings(booking.start, booking.end):
+                if stored.booking_id == booking.booking_id:
+                    schedule.remove(stored)
+
+    def conflicts(self, room, start, duration):
+        begin = to_minutes(start)
+        with self._lock:
+            self._sync()
+            return self.rooms[room].conflicts(begin, begin + int(duration))
+
+    def next_free_slot(self, after, duration, rooms=None):
+        """Earliest ``(room, start datetime)`` with ``duration`` free minutes after ``after``."""
+        begin = to_minutes(after)
+        with self._lock:
+            self._sync()
+            slots = [
+                (self.rooms[room].next_free_slot(begin, int(duration), self.opening_hours), room)
+                for room in (rooms or self.rooms)
+            ]
+        start, room = min(slots)
+        return room, from_minutes(start)
+
+    def utilisation(self, start, end):
+        """Booked versus available hours per room between two dates."""
+        opening_hours = self.opening_hours
+        days = (end - start).days
+        available = days * (opening_hours[1] - opening_hours[0]) * 60
+        begin = to_minutes(datetime.combine(start, datetime.min.time()))
+        finish = to_minutes(datetime.combine(end, datetime.min.time()))
+        rows = []
+        with self._lock:
+            self._sync()
+            for room, schedule in self.rooms.items():
+                busy = schedule.busy_minutes(begin, finish)
+                rows.append((room, busy / 60, available / 60, 100 * busy / available if available else 0.0))
+        return pd.DataFrame(rows, columns=['Room', 'Booked Hours', 'Available Hours', 'Utilisation (%)'])
+
+    def service_count(self, year, month, now=None):
+        """Appointments in the given month that were completed by ``now`` (default: the current time)."""
+        first = date(year, month, 1)
+        following = date(year + month // 12, month % 12 + 1, 1)
+        begin = to_minutes(datetime.combine(first, datetime.min.time()))
+        finish = to_minutes(datetime.combine(following, datetime.min.time()))
+        ended_by = to_minutes(now if now is not None else datetime.now())
+        with self._lock:
+            self._sync()
+            return sum(
+                schedule.count_between(begin, finish, ended_by=ended_by) for schedule in self.rooms.values()
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from model import allocation_categories, revenue_categories
+
+# Relative perturbation applied to every input (±20%)
+DEFAULT_PERTURBATION = 0.2
+
+# Base sample size of the Saltelli design; the batch holds samples * (inputs + 2) rows
+DEFAULT_SAMPLES = 4096
+
+OTHER = revenue_categories.index('Other')
+
+
+def input_names():
+    """Labels of the 12 revenue inputs: six fees followed by six volumes."""
+    return [f"{category} (fee)" for category in revenue_categories] + \
+        [f"{category} (units)" for category in revenue_categories]
+
+
+def output_names():
+    return ['Total Annual Revenue'] + list(allocation_categories)
+
+
+def base_vector(revenue_input, expected_units):
+    return np.array(
+        [revenue_input[category] for category in revenue_categories] +
+        [expected_units[category] for category in revenue_categories],
+        dtype=float
+    )
+
+
+def evaluate(inputs, allocation_percentages):
+    """Evaluate the revenue model on a batch of input rows in one pass.
+
+    ``inputs`` has shape ``(n, 12)``; the result has shape ``(n, 7)`` with
+    annual revenue followed by each ``allocated_funds`` line.
+    """
+    fees = inputs[:, :len(revenue_categories)].copy()
+    units = inputs[:, len(revenue_categories):]
+    # 'Other' is entered directly as a monthly amount, so its fee does not apply
+    fees[:, OTHER] = 1.0
+    annual_revenue = (fees * units).sum(axis=1) * 12
+
+    shares = np.array([allocation_percentages[category] for category in allocation_categories], dtype=float) / 100
+    return np.column_stack([annual_revenue, annual_revenue[:, None] * shares])
+
+
+def one_at_a_time(revenue_input, expected_units, allocation_percentages, perturbation=DEFAULT_PERTURBATION):
+    """Swing of every output when each input alone moves by ±``perturbation``."""
+    base = base_vector(revenue_input, expected_units)
+    k = len(base)
+
+    # Rows: base, then every input lowered, then every input raised
+    batch = np.tile(base, (2 * k + 1, 1))
+    batch[1 + np.arange(k), np.arange(k)] *= 1 - perturbation
+    batch[1 + k + np.arange(k), np.arange(k)] *= 1 + perturbation
+    outputs = evaluate(batch, allocation_percentages)
+
+    base_out, low_out, high_out = outputs[0], outputs[1:k + 1], outputs[k + 1:]
+    frames = []
+    for j, output in enumerate(output_names()):
+        frames.append(pd.DataFrame({
+            'Input': input_names(),
+            'Output': output,
+            'Base': base_out[j],
+            'Low': low_out[:, j],
+            'High': high_out[:, j],
+            'Swing': np.abs(high_out[:, j] - low_out[:, j]),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def sobol_indices(revenue_input, expected_units, allocation_percentages,
+                  perturbation=DEFAULT_PERTURBATION, samples=DEFAULT_SAMPLES, seed=0):
+    """First-order and total Sobol indices with every input uniform within ±``perturbation``.
+
+    Uses the Saltelli design (matrices A, B and the k mixed matrices AB_i)
+    evaluated as one batch, with the Saltelli (2010) first-order and
+    Jansen total-effect estimators.
+    """
+    base = base_vector(revenue_input, expected_units)
+    k = len(base)
+    rng = np.random.default_rng(seed)
+    low, high = base * (1 - perturbation), base * (1 + perturbation)
+    a = rng.uniform(low, high, size=(samples, k))
+    b = rng.uniform(low, high, size=(samples, k))
+
+    # AB_i is A with column i taken from B
+    ab = np.repeat(a[None, :, :], k, axis=0)
+    ab[np.arange(k), :, np.arange(k)] = b.T
+    batch = np.concatenate([a, b, ab.reshape(k * samples, k)])
+    outputs = evaluate(batch, allocation_percentages)
+    # Centring the outputs keeps the estimators stable when the mean dwarfs the variance
+    outputs -= outputs[:2 * samples].mean(axis=0)
+
+    f_a, f_b = outputs[:samples], outputs[samples:2 * samples]
+    f_ab = outputs[2 * samples:].reshape(k, samples, -1)
+    variance = np.concatenate([f_a, f_b]).var(axis=0)
+    # Constant outputs (e.g. a 0% allocation line) have no variance to decompose
+    variance = np.where(variance > 0, variance, np.nan)
+
+    first_order = (f_b[None] * (f_ab - f_a[None])).mean(axis=1) / variance
+    total = 0.5 * ((f_a[None] - f_ab) ** 2).mean(axis=1) / variance
+
+    frames = []
+    for j, output in enumerate(output_names()):
+        frames.append(pd.DataFrame({
+            'Input': input_names(),
+            'Output': output,
+            'First-order': np.clip(first_order[:, j], 0, 1),
+            'Total': np.clip(total[:, j], 0, 1),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def analyse(revenue_input, expected_units, allocation_percentages, perturbation=DEFAULT_PERTURBATION):
+    """One-at-a-time swings and Sobol indices for one input vector."""
+    return (
+        one_at_a_time(revenue_input, expected_units, allocation_percentages, perturbation),
+        sobol_indices(revenue_input, expected_units, allocation_percentages, perturbation),
+    )
+
+
+def tornado_figure(oat_df, output):
+    """Tornado chart of one output's swings, largest effect on top."""
+    df = oat_df[oat_df['Output'] == output].sort_values('Swing')
+    base = df['Base'].iloc[0]
+    fig = go.Figure([
+        go.Bar(
+            y=df['Input'], x=df['Low'] - base, base=base, orientation='h',
+            name='Input lowered', marker_color='#EF553B'
+        ),
+        go.Bar(
+            y=df['Input'], x=df['High'] - base, base=base, orientation='h',
+            name='Input raised', marker_color='#00CC96'
+        ),
+    ])
+    fig.update_layout(
+        barmode='overlay',
+        title=f'Sensitivity of {output}',
+        xaxis_title=f'{output} (Euros)',
+        yaxis_title='Input',
+        height=max(400, 30 * len(df))
+    )
+    return fig
@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit.testing.v1")
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def run_app(query_params=None):
+    app = AppTest.from_file(APP, default_timeout=60)
+    for name, value in (query_params or {}).items():
+        app.query_params[name] = value
+    return app.run()
+
+
+@pytest.mark.parametrize("section", [
+    "Introduction", "Project Description", "Budget", "Sustainability Plan", "Monitoring and Evaluation",
+])
+def test_interactive_sections_render(section):
+    app = run_app()
+    app.sidebar.radio[0].set_value(section).run()
+    assert not app.exception
+
+
+def test_shareable_link_round_trip():
+    app = run_app()
+    app.sidebar.button[0].click().run()
+    assert not app.exception
+    scenario_id = app.query_params["scenario"]
+    scenario_id = scenario_id[0] if isinstance(scenario_id, list) else scenario_id
+
+    restored = run_app({"scenario": scenario_id})
+    assert not restored.exception
+    assert any(scenario_id in caption.value for caption in restored.sidebar.caption)
+
+    missing = run_app({"scenario": "0" * 16})
+    assert any("was not found" in warning.value for warning in missing.sidebar.warning)
+
+
+def test_registry_section_with_memory_summary(tmp_path, monkeypatch):
+    import streamlit as st
+    import registry
+
+    path = tmp_path / "dogs.csv"
+    registry.DogRegistry.from_frame(pd.DataFrame({
+        'dog_id': [1, 2], 'name': ['Rex', 'Bella'], 'breed': ['Mixed', 'Husky'],
+        'city': ['Tbilisi', 'Batumi'], 'status': ['Sheltered', 'Adopted'], 'sex': ['M', 'F'],
+        'intake_date': ['2024-01-05', '2024-02-10'], 'outcome_date': [None, '2024-03-01'],
+        'age_months': [24, None], 'weight_kg': [20.5, 18.0],
+    })).to_frame().to_csv(path, index=False)
+    monkeypatch.setattr(registry, "REGISTRY_PATH", str(path))
+    st.cache_resource.clear()
+    try:
+        app = run_app()
+        app.sidebar.radio[0].set_value("Monitoring and Evaluation").run()
+        assert not app.exception
+        assert app.dataframe[0].value['age_months'].isna().tolist() == [False, True]
+        assert any("Active Sessions" in markdown.value for markdown in app.markdown)
+        assert "cache:registry_rows" in app.session_state
+    finally:
+        st.cache_resource.clear()
+
+
+def test_sensitivity_falls_back_when_the_cluster_is_unreachable(monkeypatch, caplog):
+    import streamlit as st
+    import backend
+
+    monkeypatch.setattr(backend, "REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(backend, "SHARED_SECRET", "test-secret")
+    # Without workers the page's own run() call hits the store and fails
+    monkeypatch.setattr(backend.JobQueue, "start_workers", lambda self, count=1: self)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    try:
+        app = run_app()
+        app.sidebar.radio[0].set_value("Sustainability Plan").run()
+        assert not app.exception
+        assert "computing it in this process" in caplog.text
+    finally:
+        st.cache_resource.clear()
+        st.cache_data.clear()
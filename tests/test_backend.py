@@ -0,0 +1,258 @@
+import threading
+import time
+
+import pytest
+
+from backend import FileStore, JobQueue, job_id
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(params=["file", "fakeredis"])
+def store(request, tmp_path):
+    if request.param == "file":
+        store = FileStore(str(tmp_path / "shared.db"))
+        yield store
+        store.close()
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        yield fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+def test_strings_and_expiry(store):
+    assert store.get("missing") is None
+    assert store.set("key", "value")
+    assert store.get("key") == b"value"
+    assert not store.set("key", "other", nx=True)
+    assert store.get("key") == b"value"
+    assert store.exists("key", "missing") == 1
+
+    store.set("short", b"x", ex=1)
+    assert store.exists("short") == 1
+    time.sleep(1.1)
+    assert store.get("short") is None
+    assert store.set("short", b"y", nx=True)
+
+    assert store.expire("key", 1)
+    assert not store.expire("missing", 1)
+    time.sleep(1.1)
+    assert store.exists("key") == 0
+    assert store.delete("short", "missing") == 1
+
+
+def test_counters_and_lists(store):
+    assert store.incr("count") == 1
+    assert store.incr("count", 5) == 6
+    assert store.decr("count") == 5
+    assert store.lpush("queue", b"a", b"b") == 2
+    assert store.lpush("queue", b"c") == 3
+    assert [store.rpop("queue") for _ in range(4)] == [b"a", b"b", b"c", None]
+
+
+def test_file_store_is_shared_between_connections(tmp_path):
+    first, second = FileStore(str(tmp_path / "shared.db")), FileStore(str(tmp_path / "shared.db"))
+    first.set("key", b"value")
+    assert second.get("key") == b"value"
+    assert second.set("lock", b"a", nx=True) and not first.set("lock", b"b", nx=True)
+    first.close()
+    second.close()
+
+
+def queue(store, **kwargs):
+    kwargs.setdefault("secret", SECRET)
+    return JobQueue(store, **kwargs)
+
+
+def counting_job(calls, seconds=0.0):
+    lock = threading.Lock()
+
+    def job(x):
+        with lock:
+            calls.append(x)
+        time.sleep(seconds)
+        return {"double": x * 2}
+    return job
+
+
+def test_queue_requires_a_secret(store):
+    with pytest.raises(ValueError):
+        JobQueue(store, secret=None)
+
+
+def test_job_runs_once_across_replicas(store):
+    calls = []
+    replicas = [queue(store) for _ in range(3)]
+    for replica in replicas:
+        replica.register("double", counting_job(calls, seconds=0.2))
+    results = []
+    threads = [threading.Thread(target=lambda r=r: results.append(r.run("double", 21, timeout=10))) for r in replicas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"double": 42}] * 3
+    assert calls == [21]
+    # Finished results are reused without running again
+    assert replicas[0].run("double", 21, timeout=1) == {"double": 42}
+    assert calls == [21]
+
+
+def test_failed_job_raises(store):
+    jobs = queue(store)
+    jobs.register("fail", lambda: 1 / 0)
+    with pytest.raises(RuntimeError, match="ZeroDivisionError"):
+        jobs.run("fail", timeout=5)
+
+
+def test_slots_of_a_dead_replica_are_recovered(store):
+    jobs = queue(store, max_running=2, lease_seconds=1)
+    jobs.register("double", counting_job([]))
+    # A replica died while holding every running slot
+    store.set(jobs._key("slot", "0"), b"dead", ex=1)
+    store.set(jobs._key("slot", "1"), b"dead", ex=1)
+    assert not jobs.work_once()
+    assert jobs.run("double", 3, timeout=4) == {"double": 6}
+
+
+def test_job_of_a_dead_worker_is_requeued(store):
+    calls = []
+    jobs = queue(store, lease_seconds=1)
+    jobs.register("double", counting_job(calls))
+    job = jobs.submit("double", 5)
+    # A worker popped the job, took its lock and died while running it
+    assert store.rpop(jobs._key("queue")) is not None
+    store.set(jobs._key("running", job), b"dead", ex=1)
+    store.delete(jobs._key("claim", job))
+    assert jobs.run("double", 5, timeout=4) == {"double": 10}
+    assert calls == [5]
+
+
+def test_long_job_keeps_its_lease(store):
+    calls = []
+    first, second = queue(store, lease_seconds=1), queue(store, lease_seconds=1)
+    for replica in (first, second):
+        replica.register("double", counting_job(calls, seconds=3))
+        replica.start_workers()
+    try:
+        # The job outlives its lease several times over; a lapsed claim would make run() re-queue it
+        assert first.run("double", 7, timeout=10) == {"double": 14}
+    finally:
+        first.stop()
+        second.stop()
+    assert calls == [7]
+
+
+def test_concurrency_cap_holds_across_replicas(store):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def job(x):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return x
+
+    replicas = [queue(store, max_running=2) for _ in range(2)]
+    for replica in replicas:
+        replica.register("job", job)
+        replica.start_workers(3)
+    try:
+        for x in range(6):
+            replicas[0].submit("job", x)
+        assert [replicas[x % 2].run("job", x, timeout=10) for x in range(6)] == list(range(6))
+    finally:
+        for replica in replicas:
+            replica.stop()
+    assert peak[0] == 2
+
+
+def test_tampered_results_are_not_loaded(store):
+    jobs = queue(store)
+    jobs.register("double", counting_job([]))
+    job = job_id("double", (4,))
+    forged = JobQueue(store, secret="attacker")._dump_result(job, ("ok", "pwned"))
+    store.set(jobs._key("result", job), forged)
+    with pytest.raises(ValueError, match="invalid signature"):
+        jobs.run("double", 4, timeout=1)
+
+
+def test_queue_entries_are_json(store):
+    jobs = queue(store)
+    jobs.register("double", counting_job([]))
+    jobs.submit("double", 4)
+    assert store.rpop(jobs._key("queue")).startswith(b"{")
+
+
+def test_backed_up_queue_runs_every_job_once(store):
+    calls = []
+    jobs = queue(store, max_running=2, lease_seconds=1)
+    jobs.register("double", counting_job(calls, seconds=2))
+    jobs.start_workers(2)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda x=x: results.setdefault(x, jobs.run("double", x, timeout=15)))
+        for x in range(4)
+    ]
+    try:
+        # The last two jobs wait in the queue for longer than the lease
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        jobs.stop()
+    assert results == {x: {"double": 2 * x} for x in range(4)}
+    assert sorted(calls) == [0, 1, 2, 3]
+
+
+def test_duplicate_queue_entries_run_once(store):
+    calls = []
+    jobs = queue(store)
+    jobs.register("double", counting_job(calls, seconds=0.5))
+    jobs.submit("double", 8)
+    entry = store.rpop(jobs._key("queue"))
+    store.lpush(jobs._key("queue"), entry, entry)
+    workers = [threading.Thread(target=jobs.work_once) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert calls == [8]
+    assert jobs.run("double", 8, timeout=1) == {"double": 16}
+
+
+def test_malformed_entries_do_not_kill_workers(store, caplog):
+    jobs = queue(store)
+    jobs.register("double", counting_job([]))
+    for entry in (b"not json", b"[]", b'{"job": "x"}'):
+        store.lpush(jobs._key("queue"), entry)
+    jobs.start_workers()
+    try:
+        assert jobs.run("double", 2, timeout=5) == {"double": 4}
+        assert all(worker.is_alive() for worker in jobs._workers)
+    finally:
+        jobs.stop()
+    assert "malformed job queue entry" in caplog.text
+
+
+def test_store_errors_do_not_kill_workers(store, monkeypatch, caplog):
+    jobs = queue(store)
+    jobs.register("double", counting_job([]))
+    original, failures = store.rpop, [1, 2]
+
+    def flaky_rpop(key):
+        if failures:
+            failures.pop()
+            raise ConnectionError("store unreachable")
+        return original(key)
+
+    monkeypatch.setattr(store, "rpop", flaky_rpop)
+    jobs.start_workers()
+    try:
+        assert jobs.run("double", 3, timeout=5) == {"double": 6}
+    finally:
+        jobs.stop()
+    assert "Job worker failed" in caplog.text
@@ -0,0 +1,120 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from donations import DonationLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = DonationLedger(str(tmp_path / "donations.db"), batch_size=3, flush_interval=60)
+    yield ledger
+    ledger.close()
+
+
+def test_totals_are_maintained_per_scope(ledger):
+    day = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    ledger.record_many([
+        ("ana", 10, "Food", day),
+        ("ana", 5.5, "Vet", day),
+        ("ben", 20, "Food", day),
+    ])
+    assert ledger.total() == (35.5, 3)
+    assert ledger.donor_total("ana") == (15.5, 2)
+    assert ledger.campaign_total("Food") == (30.0, 2)
+    assert ledger.day_total("2024-05-01") == (35.5, 3)
+
+
+def test_reads_include_buffered_donations(ledger):
+    ledger.record("ana", 10)
+    assert len(ledger._pending) == 1
+    assert ledger.total() == (10.0, 1)
+    assert ledger._pending == []
+
+
+def test_record_flushes_full_batch(ledger):
+    for _ in range(3):
+        ledger.record("ana", 1)
+    assert ledger._pending == []
+
+
+def test_record_flushes_after_interval(tmp_path):
+    ledger = DonationLedger(str(tmp_path / "donations.db"), batch_size=100, flush_interval=0)
+    ledger.record("ana", 1)
+    assert ledger._pending == []
+    ledger.close()
+
+
+def test_rejects_non_positive_and_non_finite_amounts(ledger):
+    for amount in (0, -5, 0.001, float("nan"), float("inf")):
+        with pytest.raises(ValueError):
+            ledger.record("ana", amount)
+
+
+def test_rejects_oversized_amounts_and_keeps_working(ledger):
+    with pytest.raises(ValueError, match="must not exceed"):
+        ledger.record_many([("a", 1e20, "G", None)])
+    with pytest.raises(ValueError, match="must not exceed"):
+        ledger.record("a", 1e20)
+    ledger.record("b", 5)
+    assert ledger.total() == (5.0, 1)
+
+
+@pytest.mark.parametrize("donated_at", [1760000000000, -10 ** 12, float("inf"), 1e300])
+def test_rejects_out_of_range_dates_without_losing_valid_rows(ledger, donated_at):
+    ledger.record("a", 5)
+    with pytest.raises(ValueError):
+        ledger.record_many([("b", 5, "G", 1760000000), ("c", 5, "G", donated_at)])
+    with pytest.raises(ValueError):
+        ledger.record("c", 5, donated_at=donated_at)
+    assert ledger.total() == (5.0, 1)
+    ledger.record_many([("b", 5, "G", 1760000000)])
+    assert ledger.total() == (10.0, 2)
+
+
+def test_permanent_flush_errors_do_not_block_the_ledger(ledger):
+    # A row the schema rejects (amount_cents > 0) fails the batch permanently
+    ledger._pending.append(("a", "G", 0, 1760000000))
+    with pytest.raises(sqlite3.IntegrityError):
+        ledger.flush()
+    assert ledger._pending == []
+    ledger.record("b", 5)
+    assert ledger.total() == (5.0, 1)
+
+
+def test_donations_between_filters_by_donor_and_campaign(ledger):
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    end = datetime(2024, 5, 2, tzinfo=timezone.utc)
+    noon = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    ledger.record_many([
+        ("ana", 10, "Food", noon),
+        ("ana", 5, "Vet", noon),
+        ("ben", 20, "Food", noon),
+        ("ana", 7, "Food", end),
+    ])
+    assert ledger.donations_between(start, end) == (35.0, 3)
+    assert ledger.donations_between(start, end, donor="ana") == (15.0, 2)
+    assert ledger.donations_between(start, end, campaign="Food") == (30.0, 2)
+    assert ledger.donations_between(start, end, donor="ana", campaign="Food") == (10.0, 1)
+
+
+def test_ledger_is_append_only(ledger):
+    ledger.record_many([("ana", 10, "Food", None)])
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        ledger._conn.execute("DELETE FROM donations")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        ledger._conn.execute("UPDATE donations SET amount_cents = 1")
+
+
+def test_locked_flush_keeps_batch_and_raises_real_error(ledger):
+    ledger._conn.execute("PRAGMA busy_timeout = 0")
+    other = sqlite3.connect(ledger.path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    ledger.record("ana", 10)
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        ledger.flush()
+    assert len(ledger._pending) == 1
+    other.execute("ROLLBACK")
+    other.close()
+    assert ledger.total() == (10.0, 1)
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from donations import DonationLedger
+from feed import DonationFeed, merge_delta, parse_event
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = DonationLedger(str(tmp_path / "donations.db"))
+    yield ledger
+    ledger.close()
+
+
+@pytest.mark.parametrize("line", [
+    "not json",
+    '{"donor": "ana"}',
+    '{"amount": "abc"}',
+    '{"amount": 0}',
+    '{"amount": -3}',
+    '{"amount": 0.001}',
+    '{"amount": NaN}',
+    '{"amount": "inf"}',
+    '{"amount": 5, "ts": "abc"}',
+    '{"amount": 5, "ts": [1]}',
+    '{"amount": 1e20}',
+    '{"amount": 5, "ts": 1760000000000}',
+    '{"amount": 5, "ts": -1e15}',
+    '{"amount": 5, "ts": 1e400}',
+    '[1, 2]',
+])
+def test_parse_event_rejects_malformed_lines(line):
+    assert parse_event(line) is None
+
+
+def test_parse_event_defaults():
+    donor, amount, campaign, ts = parse_event('{"amount": "12.5", "ts": "1700000000"}')
+    assert (donor, amount, campaign, ts) == ("Anonymous", 12.5, "General", 1700000000)
+
+
+def test_subscription_snapshot_plus_deltas_matches_feed(ledger):
+    ledger.record_many([("ana", 10, "Food", 1700000000)])
+    feed = DonationFeed(ledger)
+    subscription = feed.subscribe()
+    state = subscription.snapshot
+    assert (state["amount"], state["count"]) == (10.0, 1)
+
+    feed.publish([("ben", 5.0, "Food", 1700000030), ("cy", 2.0, "Vet", 1700000090)])
+    merge_delta(state, subscription.wait(timeout=1))
+    assert state == feed.snapshot()
+    assert state["campaigns"] == {"Food": (15.0, 2), "Vet": (2.0, 1)}
+
+    subscription.close()
+    feed.publish([("ana", 1.0, "Food", 1700000000)])
+    assert subscription.wait(timeout=0) is None
+
+
+def test_bad_events_do_not_stop_ingestion(ledger):
+    feed = DonationFeed(ledger, batch_interval=0.01).start()
+    try:
+        subscription = feed.subscribe()
+        feed.submit('{"amount": 5, "ts": "abc"}').result(1)
+        feed.submit('{"amount": NaN}').result(1)
+        feed.submit('{"donor": "ana", "amount": 7, "ts": 1700000000}').result(1)
+        delta = subscription.wait(timeout=2)
+        assert (delta["amount"], delta["count"]) == (7.0, 1)
+        assert ledger.total() == (7.0, 1)
+    finally:
+        feed.stop()
+
+
+def test_out_of_range_events_do_not_stop_ingestion(ledger):
+    feed = DonationFeed(ledger, batch_interval=0.05).start()
+    try:
+        subscription = feed.subscribe()
+        feed.submit('{"amount": 1e20, "ts": 1700000000}').result(1)
+        feed.submit('{"amount": 5, "ts": 1760000000000}').result(1)
+        feed.submit('{"amount": 7, "ts": 1700000000}').result(1)
+        delta = subscription.wait(timeout=2)
+        assert (delta["amount"], delta["count"]) == (7.0, 1)
+        feed.submit('{"amount": 3, "ts": 1700000000}').result(1)
+        assert subscription.wait(timeout=2)["amount"] == 3.0
+        assert ledger.total() == (10.0, 2)
+    finally:
+        feed.stop()
+
+
+def test_failing_batch_is_logged_and_ingestion_continues(ledger, monkeypatch, caplog):
+    feed = DonationFeed(ledger, batch_interval=0.01).start()
+    original = ledger.record_many
+    calls = []
+
+    def flaky(events):
+        calls.append(events)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return original(events)
+
+    monkeypatch.setattr(ledger, "record_many", flaky)
+    try:
+        subscription = feed.subscribe()
+        feed.submit('{"amount": 1, "ts": 1700000000}').result(1)
+        deadline = time.monotonic() + 2
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        feed.submit('{"amount": 2, "ts": 1700000000}').result(1)
+        delta = subscription.wait(timeout=2)
+        assert delta["amount"] == 2.0
+        assert "Failed to ingest a batch" in caplog.text
+    finally:
+        feed.stop()
@@ -0,0 +1,42 @@
+import numpy as np
+
+from memory import SessionMemoryGuard, estimate_size
+
+
+def test_estimate_size_counts_referenced_data():
+    array = np.zeros(100_000)
+    assert estimate_size({"rows": array}) >= array.nbytes
+    shared = [array, array]
+    assert estimate_size(shared) < 2 * array.nbytes
+
+
+def test_enforce_evicts_largest_cache_entries_first():
+    guard = SessionMemoryGuard(budget_mb=1)
+    state = {
+        "cache:big": np.zeros(200_000),
+        "cache:small": np.zeros(1_000),
+        "inputs": np.zeros(1_000),
+    }
+    used, evicted = guard.enforce("session-a", state)
+    assert evicted == ["cache:big"]
+    assert set(state) == {"cache:small", "inputs"}
+    assert used <= guard.budget_bytes
+
+
+def test_non_cache_entries_are_never_evicted():
+    guard = SessionMemoryGuard(budget_mb=0.001)
+    state = {"inputs": np.zeros(10_000)}
+    used, evicted = guard.enforce("session-a", state)
+    assert evicted == [] and "inputs" in state
+    assert used > guard.budget_bytes
+
+
+def test_summary_does_not_expose_session_ids():
+    guard = SessionMemoryGuard(budget_mb=1)
+    guard.enforce("secret-session-a", {"x": np.zeros(1_000)})
+    guard.enforce("secret-session-b", {"x": np.zeros(10_000)})
+    summary = guard.summary()
+    assert summary["sessions"] == 2
+    assert summary["largest_bytes"] >= 80_000
+    assert summary["total_bytes"] > summary["largest_bytes"]
+    assert "secret" not in repr(summary)
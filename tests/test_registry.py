@@ -0,0 +1,67 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from registry import DogRegistry
+
+
+@pytest.fixture
+def registry():
+    return DogRegistry.from_frame(pd.DataFrame({
+        'dog_id': [1, 2, 3],
+        'name': ['Rex', 'Bella', None],
+        'breed': ['Mixed', 'Husky', 'Mixed'],
+        'city': ['Tbilisi', 'Batumi', 'Tbilisi'],
+        'status': ['Sheltered', 'Adopted', 'Sheltered'],
+        'sex': ['M', 'F', 'M'],
+        'intake_date': ['2024-01-05', '2024-02-10', 'not a date'],
+        'outcome_date': [None, '2024-03-01', None],
+        'age_months': [24, None, 6],
+        'weight_kg': [20.5, 18.0, None],
+    }))
+
+
+def test_records_decode_values(registry):
+    rex, bella, unknown = registry
+    assert rex.name == 'Rex' and rex.intake_date == date(2024, 1, 5) and rex.outcome_date is None
+    assert bella.outcome_date == date(2024, 3, 1)
+    assert unknown.name == 'Unknown' and unknown.intake_date is None
+    assert registry[-1].dog_id == 3
+    with pytest.raises(IndexError):
+        registry[3]
+
+
+def test_missing_integers_are_not_shown_as_sentinel(registry):
+    assert registry[1].age_months is None
+    assert registry[0].age_months == 24
+    frame = registry.to_frame()
+    assert str(frame['age_months'].dtype) == 'Int16'
+    assert frame['age_months'].isna().tolist() == [False, True, False]
+    assert (frame['age_months'].dropna() >= 0).all()
+    assert np.isnan(frame['weight_kg'][2])
+
+
+def test_select_and_counts(registry):
+    rows = registry.select(city='Tbilisi')
+    assert rows.tolist() == [0, 2]
+    assert registry.select(city=['Batumi'], status='Adopted').tolist() == [1]
+    assert registry.select(city='Kutaisi').tolist() == []
+    counts = registry.counts('status', rows)
+    assert counts['Sheltered'] == 2 and counts['Adopted'] == 0
+    assert registry.to_frame(rows)['name'].tolist() == ['Rex', 'Unknown']
+
+
+def test_columns_are_read_only_and_compact(registry):
+    with pytest.raises(ValueError):
+        registry._columns['dog_id'][0] = 9
+    assert registry.nbytes < 40 * len(registry)
+
+
+def test_from_csv(tmp_path, registry):
+    path = tmp_path / 'dogs.csv'
+    registry.to_frame().to_csv(path, index=False)
+    loaded = DogRegistry.from_csv(path)
+    assert loaded[1].age_months is None
+    assert loaded[0].to_dict() == registry[0].to_dict()
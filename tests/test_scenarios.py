@@ -0,0 +1,70 @@
+import copy
+
+import numpy as np
+import pytest
+
+from backend import FileStore
+from model import compute_all, default_inputs
+from scenarios import ScenarioStore, SharedScenarioStore, canonicalize, same_inputs, scenario_hash
+
+
+def test_canonical_form_ignores_key_order_and_number_types():
+    left = {"b": [1, 2.0], "a": {"y": np.int64(50), "x": True}}
+    right = {"a": {"x": True, "y": 50.0}, "b": [1.0, 2]}
+    assert canonicalize(left) == canonicalize(right)
+    assert same_inputs(left, right)
+    assert scenario_hash(left) == scenario_hash(right)
+    assert scenario_hash(left) != scenario_hash({"a": 1})
+
+
+def counting(compute):
+    calls = []
+
+    def wrapped(inputs):
+        calls.append(inputs)
+        return compute(inputs)
+    return wrapped, calls
+
+
+@pytest.fixture(params=["sqlite", "shared"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = ScenarioStore(str(tmp_path / "scenarios.db"))
+    else:
+        store = SharedScenarioStore(FileStore(str(tmp_path / "shared.db")))
+    yield store
+    store.close()
+
+
+def test_save_and_load_round_trip(store):
+    compute, calls = counting(compute_all)
+    scenario_id = store.save(default_inputs, compute)
+    assert scenario_id == scenario_hash(default_inputs)
+
+    scenario = store.load(scenario_id)
+    assert same_inputs(scenario.inputs, default_inputs)
+    expected = compute_all(default_inputs)
+    for name, frame in expected["frames"].items():
+        loaded = scenario.results["frames"][name]
+        assert list(loaded.columns) == list(frame.columns)
+        assert np.allclose(loaded.select_dtypes("number"), frame.select_dtypes("number"))
+    assert set(scenario.results["figures"]) == set(expected["figures"])
+
+    # Saving the same inputs again does not recompute, and loads come from the cache
+    assert store.save(copy.deepcopy(default_inputs), compute) == scenario_id
+    assert len(calls) == 1
+    assert store.load(scenario_id) is scenario
+
+
+def test_unknown_scenario_is_none(store):
+    assert store.load("0" * 16) is None
+
+
+def test_cache_is_bounded(tmp_path):
+    store = ScenarioStore(str(tmp_path / "scenarios.db"), cache_size=1)
+    first = store.save({"x": 1}, lambda inputs: {"frames": {}, "figures": {}})
+    second = store.save({"x": 2}, lambda inputs: {"frames": {}, "figures": {}})
+    store.load(first)
+    store.load(second)
+    assert list(store._cache) == [second]
+    store.close()
@@ -0,0 +1,104 @@
+import logging
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+from scheduler import Booking, ClinicScheduler, RoomSchedule
+
+ROOM = 'Examination Room 1'
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "clinic.db")
+
+
+@pytest.fixture
+def scheduler(path):
+    scheduler = ClinicScheduler(path)
+    yield scheduler
+    scheduler.close()
+
+
+def at(hour, minute=0, day=3):
+    return datetime(2024, 6, day, hour, minute)
+
+
+def test_room_schedule_intervals():
+    schedule = RoomSchedule(ROOM)
+    schedule.add(Booking(1, ROOM, 100, 160, 'Examination', None))
+    schedule.add(Booking(2, ROOM, 200, 230, 'Examination', None))
+    assert schedule.is_free(160, 200)
+    assert not schedule.is_free(150, 170)
+    assert [b.booking_id for b in schedule.bookings(150, 210)] == [1, 2]
+    assert schedule.busy_minutes(130, 215) == 30 + 15
+    assert schedule.count_between(0, 300) == 2
+    assert schedule.count_between(0, 300, ended_by=200) == 1
+    with pytest.raises(ValueError):
+        schedule.add(Booking(3, ROOM, 220, 240, 'Examination', None))
+
+
+def test_book_rejects_conflicts_and_out_of_hours(scheduler):
+    scheduler.book(ROOM, at(10), 60, 'Examination', 'Rex')
+    with pytest.raises(ValueError, match="already booked"):
+        scheduler.book(ROOM, at(10, 30), 30, 'Vaccination')
+    for start, duration in ((at(3), 30), (at(8, 45), 30), (at(17, 45), 30)):
+        with pytest.raises(ValueError, match="opening hours"):
+            scheduler.book(ROOM, start, duration, 'Examination')
+    scheduler.book(ROOM, at(11), 30, 'Vaccination')
+    scheduler.book('Surgical Suite', at(10, 30), 30, 'Surgery')
+
+
+def test_next_free_slot_and_utilisation(scheduler):
+    scheduler.book(ROOM, at(9), 120, 'Surgery')
+    assert scheduler.next_free_slot(at(9), 60, rooms=[ROOM]) == (ROOM, at(11))
+    assert scheduler.next_free_slot(at(17, 30), 60, rooms=[ROOM]) == (ROOM, at(9, day=4))
+
+    utilisation = scheduler.utilisation(date(2024, 6, 3), date(2024, 6, 4)).set_index('Room')
+    assert utilisation.loc[ROOM, 'Booked Hours'] == 2
+    assert utilisation.loc[ROOM, 'Utilisation (%)'] == pytest.approx(100 * 2 / 9)
+    assert (utilisation['Utilisation (%)'] <= 100).all()
+
+
+def test_service_count_only_counts_completed_appointments(scheduler):
+    scheduler.book(ROOM, at(9), 30, 'Examination')
+    scheduler.book(ROOM, at(10), 30, 'Examination')
+    scheduler.book(ROOM, at(10, day=20), 30, 'Examination')
+    assert scheduler.service_count(2024, 6, now=at(10, 15)) == 1
+    assert scheduler.service_count(2024, 6, now=at(10, 30)) == 2
+    assert scheduler.service_count(2024, 6, now=datetime(2024, 7, 1)) == 3
+    assert scheduler.service_count(2024, 5, now=datetime(2024, 7, 1)) == 0
+
+
+def test_two_processes_cannot_double_book(path):
+    first, second = ClinicScheduler(path), ClinicScheduler(path)
+    first.book(ROOM, at(10), 60, 'Examination')
+    # The second scheduler's in-memory index has not seen the booking yet
+    with pytest.raises(ValueError, match="already booked"):
+        second.book(ROOM, at(10, 30), 30, 'Examination')
+    assert len(second.rooms[ROOM]) == 1
+    assert second.next_free_slot(at(10), 30, rooms=[ROOM]) == (ROOM, at(11))
+
+    booking = second.book(ROOM, at(11), 30, 'Examination')
+    assert first.conflicts(ROOM, at(11), 30)[0].booking_id == booking.booking_id
+    first.cancel(booking)
+    assert second.conflicts(ROOM, at(11), 30) == []
+    first.close()
+    second.close()
+
+
+def test_loading_skips_overlapping_rows(path, caplog):
+    ClinicScheduler(path).close()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO appointments (room, start, end, service, dog) VALUES (?, ?, ?, ?, ?)",
+        [(ROOM, 100, 160, 'Examination', None), (ROOM, 150, 200, 'Examination', None)],
+    )
+    conn.commit()
+    conn.close()
+    with caplog.at_level(logging.WARNING, logger="scheduler"):
+        scheduler = ClinicScheduler(path)
+    assert len(scheduler.rooms[ROOM]) == 1
+    assert "Skipping appointment" in caplog.text
+    scheduler.close()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from model import compute_revenue, default_allocation, default_revenue, default_units
+from sensitivity import (
+    analyse, base_vector, evaluate, input_names, one_at_a_time, output_names, sobol_indices, tornado_figure,
+)
+
+
+def test_evaluate_matches_the_revenue_model():
+    outputs = evaluate(base_vector(default_revenue, default_units)[None], default_allocation)
+    frames = compute_revenue(default_revenue, default_units, default_allocation)["frames"]
+    annual = frames["revenue"]["Monthly Revenue (Euros)"].sum() * 12
+    assert outputs.shape == (1, len(output_names()))
+    assert outputs[0, 0] == pytest.approx(annual)
+    assert outputs[0, 1:] == pytest.approx(frames["allocated_funds"]["Annual Allocation (Euros)"].to_numpy())
+
+
+def test_one_at_a_time_swings():
+    perturbation = 0.1
+    oat = one_at_a_time(default_revenue, default_units, default_allocation, perturbation)
+    revenue = oat[oat["Output"] == "Total Annual Revenue"].set_index("Input")
+    assert list(revenue.index) == input_names()
+
+    # Revenue is linear in each input: the swing is 2 * perturbation * that stream's annual revenue
+    for category in default_revenue:
+        stream = default_units[category] * 12 * (1 if category == "Other" else default_revenue[category])
+        assert revenue.loc[f"{category} (units)", "Swing"] == pytest.approx(2 * perturbation * stream)
+    assert revenue.loc["Other (fee)", "Swing"] == 0
+
+
+def test_sobol_indices_of_an_additive_model():
+    sobol = sobol_indices(default_revenue, default_units, default_allocation, samples=2048)
+    revenue = sobol[sobol["Output"] == "Total Annual Revenue"].set_index("Input")
+    assert revenue.loc["Other (fee)", "Total"] == pytest.approx(0, abs=1e-9)
+    # Products of two inputs are nearly additive within ±20%, so first-order indices sum to about 1
+    assert revenue["First-order"].sum() == pytest.approx(1, abs=0.1)
+    assert (revenue["Total"] >= revenue["First-order"] - 0.05).all()
+    assert sobol[["First-order", "Total"]].stack().between(0, 1).all()
+
+
+def test_zero_allocation_has_no_indices():
+    allocation = dict(default_allocation)
+    zero, other = list(allocation)[:2]
+    allocation[other] += allocation[zero]
+    allocation[zero] = 0
+    sobol = sobol_indices(default_revenue, default_units, allocation, samples=256)
+    assert sobol[sobol["Output"] == zero]["Total"].isna().all()
+
+
+def test_analyse_and_tornado():
+    oat, sobol = analyse(default_revenue, default_units, default_allocation)
+    assert len(oat) == len(sobol) == len(input_names()) * len(output_names())
+    figure = tornado_figure(oat, "Total Annual Revenue")
+    assert len(figure.data) == 2
+    # Largest swing is drawn last, i.e. on top
+    swings = oat[oat["Output"] == "Total Annual Revenue"]["Swing"]
+    assert np.isclose(abs(figure.data[1].x[-1] - figure.data[0].x[-1]), swings.max())